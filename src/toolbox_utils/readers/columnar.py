@@ -0,0 +1,108 @@
+"""For reading Parquet, Feather, and Arrow IPC files."""
+
+import os
+
+import pandas as pd
+
+_FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "ipc"}
+
+
+def _dataset(filename):
+    """Return a pyarrow dataset of a Parquet, Feather, or Arrow IPC file."""
+    import pyarrow.dataset as ds
+
+    _, ext = os.path.splitext(filename)
+    return ds.dataset(filename, format=_FORMATS.get(ext.lower(), "parquet"))
+
+
+def _index_column(schema):
+    """
+    Return the name of the date index column, or None.
+
+    The index written by pandas is found from the pandas metadata,
+    otherwise the first column is used if it holds dates.
+    """
+    import pyarrow as pa
+
+    metadata = schema.pandas_metadata or {}
+    names = [i for i in metadata.get("index_columns", []) if isinstance(i, str)]
+    if names:
+        return names[0] if len(names) == 1 else None
+    if len(schema) and (
+        pa.types.is_timestamp(schema.types[0]) or pa.types.is_date(schema.types[0])
+    ):
+        return schema.names[0]
+    return None
+
+
+def columnar_columns(filename):
+    """Return the data column names of a Parquet, Feather, or Arrow file."""
+    schema = _dataset(filename).schema
+    index = _index_column(schema)
+    metadata = schema.pandas_metadata or {}
+    skip = {
+        index,
+        *(i for i in metadata.get("index_columns", []) if isinstance(i, str)),
+    }
+    return [i for i in schema.names if i not in skip]
+
+
+def _date_filter(field, start_date=None, end_date=None):
+    """Return the dataset filter expression for the date window, or None."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if not (pa.types.is_timestamp(field.type) or pa.types.is_date(field.type)):
+        return None
+
+    expression = None
+    for date, compare in ((start_date, "__ge__"), (end_date, "__le__")):
+        if date is None:
+            continue
+        date = pd.Timestamp(date)
+        tz = getattr(field.type, "tz", None)
+        if tz is not None:
+            date = date.tz_localize(tz) if date.tz is None else date.tz_convert(tz)
+        elif date.tz is not None:
+            date = date.tz_convert(None)
+        if pa.types.is_date(field.type):
+            date = date.date()
+        term = getattr(ds.field(field.name), compare)(pa.scalar(date, type=field.type))
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def columnar_extract(filename, columns=None, start_date=None, end_date=None):
+    """
+    Reads Parquet, Feather, or Arrow IPC files and creates a DataFrame.
+
+    Only the `columns`, a list of column names or numbers starting at 1, are
+    read.  If `start_date` or `end_date` are given they are used as a filter
+    on the date index column, so Parquet row groups outside of the window
+    are skipped using their statistics.
+    """
+    from .. import tsutils
+
+    dataset = _dataset(filename)
+    index = _index_column(dataset.schema)
+
+    names = None
+    if columns:
+        cols = columnar_columns(filename)
+        names = [
+            cols[i] for i in tsutils._column_positions(cols, tsutils.make_list(columns))
+        ]
+        if index is not None:
+            names = [index, *names]
+
+    expression = None
+    if index is not None:
+        expression = _date_filter(dataset.schema.field(index), start_date, end_date)
+
+    tsd = dataset.to_table(columns=names, filter=expression).to_pandas()
+
+    if index is not None and index in tsd.columns:
+        tsd = tsd.set_index(index)
+    if isinstance(tsd.index, pd.DatetimeIndex) and tsd.index.name is None:
+        tsd.index.name = "Datetime"
+    return tsd
@@ -1,24 +1,37 @@
 """hspfbintoolbox to read HSPF binary files."""
 
 import datetime
+import mmap
+import os
 import struct
 import sys
+import zipfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
 try:
-    from typing import Literal
+    from typing import Dict, List, Literal, Optional, Union
 except ImportError:
-    from typing import Literal
+    from typing import Dict, List, Literal, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from .. import tsutils
-
 code2intervalmap = {5: "yearly", 4: "monthly", 3: "daily", 2: "bivl"}
 
 interval2codemap = {"yearly": 5, "monthly": 4, "daily": 3, "bivl": 2}
 
 code2freqmap = {5: "A", 4: "M", 3: "D", 2: None}
 
+# Record length bitfield and leader: rectype, operation, lue, group
+_RECORD_LEADER = struct.Struct("4BI8sI8s")
+
+# Data record leader: unused, level, year, month, day, hour, minute
+_DATA_LEADER = struct.Struct("7I")
+
+_NAME_LENGTH = struct.Struct("I")
+
 
 _LOCAL_DOCSTRINGS = {
     "hbnfilename": """hbnfilename: str
@@ -54,12 +67,10 @@ def tuple_search(findme, haystack):
     ]
 
 
-def _get_data(binfilename, interval="daily", labels=None, catalog_only=True):
-    """Underlying function to read from the binary file.  Used by
-    'extract', 'catalog'.
-    """
-    if labels is None:
-        labels = [",,,"]
+def _parse_labels(labels, intervalcode):
+    """Check the labels and expand them into a list of five item lists."""
+    from .. import tsutils
+
     testem = {
         "PERLND": [
             "ATEMP",
@@ -96,15 +107,8 @@ def _get_data(binfilename, interval="daily", labels=None, catalog_only=True):
         "": [""],
     }
 
-    collect_dict = {}
     lablist = []
 
-    # Normalize interval code
-    try:
-        intervalcode = interval2codemap[interval.lower()]
-    except AttributeError:
-        intervalcode = None
-
     # convert label tuples to lists
     labels = list(labels)
 
@@ -189,11 +193,25 @@ def _get_data(binfilename, interval="daily", labels=None, catalog_only=True):
             words[1] = luenum
             lablist.append(list(words))
 
-    # Now read through the binary file and collect the data matching the labels
+    return lablist
+
+
+def _back_pointer_length(recpos):
+    """Number of bytes in the variable-length back pointer ending a record."""
+    reccnt = recpos * 4 + 1
+    if reccnt >= 256**2:
+        return 3
+    if reccnt >= 256:
+        return 2
+    return 1
+
+
+@contextmanager
+def _open_hbn(binfilename):
+    """Memory map a HSPF binary output file after checking the magic byte."""
+    from .. import tsutils
+
     with open(binfilename, "rb") as binfp:
-        labeltest = set()
-        vnames = {}
-        ndates = set()
         # read first byte - must be hex FD (decimal 253) for valid file.
         magicbyte = binfp.read(1)
         if magicbyte != b"\xfd":
@@ -206,28 +224,95 @@ def _get_data(binfilename, interval="daily", labels=None, catalog_only=True):
                     """
                 )
             )
+        with mmap.mmap(binfp.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
 
-        # loop through each record
-        while True:
-            # reinitialize counter for record length - used to compute skip at
-            # end
-            recpos = 0
 
-            # read first four bytes to get record length bitfield
-            try:
-                reclen1, reclen2, reclen3, reclen = struct.unpack("4B", binfp.read(4))
-                recpos += 4
-            except struct.error:
-                # End of file.
-                break
+class _RecordIndex:
+    """Location of every data record in a HBN file that matches the labels.
+
+    Only the record leaders are decoded by `scan`.  The values are left in
+    the file until `_fill` copies them into a preallocated array.
+    """
 
-            # get record leader - next 24 bytes
-            rectype, optype, lue, group = struct.unpack("I8sI8s", binfp.read(24))
-            recpos += 24
+    def __init__(self, lablist):
+        self.lablist = lablist
+        self.labeltest = set()
+        # (operation, lue, group) -> variable names from the header records
+        self.vnames = {}
+        # (operation, lue, group, level) -> block number, None if no match
+        self.blockmap = {}
+        # block number -> (number of values, value positions, column numbers)
+        self.blocks = []
+        # key -> column number within the level of the key
+        self.columns = {}
+        # level -> number of columns
+        self.ncolumns = {}
+        # level -> {datetime: date number}
+        self.dates = {}
+        # level -> (value offsets, block numbers, date numbers)
+        self.records = {}
+        # offset of the first record that has not been scanned
+        self.offset = 1
+
+    def _block(self, optype, lue, group, level):
+        """Match the variables of a data record layout against the labels."""
+        vnames = self.vnames[(optype, lue, group)]
+        positions = []
+        columns = []
+        for i, vname in enumerate(vnames):
+            tmpkey = (
+                optype.decode("ascii"),
+                lue,
+                group.decode("ascii"),
+                vname.decode("ascii"),
+                level,
+            )
+
+            nres = None
+            for lbl in self.lablist:
+                res = tuple_search(tmpkey, [lbl])
+                if not res:
+                    continue
+                self.labeltest.add(tuple(lbl))
+                nres = res[0][1]
+            if nres is None:
+                continue
+
+            if nres not in self.columns:
+                self.columns[nres] = self.ncolumns.get(level, 0)
+                self.ncolumns[level] = self.columns[nres] + 1
+            positions.append(i)
+            columns.append(self.columns[nres])
+
+        if not positions:
+            return None
+
+        self.blocks.append(
+            (len(vnames), np.array(positions), np.array(columns, dtype=np.int64))
+        )
+        self.dates.setdefault(level, {})
+        self.records.setdefault(level, (array("q"), array("q"), array("q")))
+        return len(self.blocks) - 1
+
+    def scan(self, buf):
+        """Index the complete records from `self.offset` to the end of `buf`."""
+        end = len(buf)
+        offset = self.offset
+        while offset + _RECORD_LEADER.size <= end:
+            (
+                reclen1,
+                reclen2,
+                reclen3,
+                reclen,
+                rectype,
+                optype,
+                lue,
+                group,
+            ) = _RECORD_LEADER.unpack_from(buf, offset)
+            recpos = _RECORD_LEADER.size
 
             # clean up
-            rectype = int(rectype)
-            lue = int(lue)
             optype = optype.strip()
             group = group.strip()
 
@@ -237,129 +322,308 @@ def _get_data(binfilename, interval="daily", labels=None, catalog_only=True):
 
                 # parse reclen bitfield to get actual remaining length
                 # the " - 24 " subtracts the 24 bytes already read
-                reclen1 = int(reclen1 / 4)
-                reclen2 = reclen2 * 64 + reclen1
-                reclen3 = reclen3 * 16384 + reclen2
-                reclen = reclen * 4194304 + reclen3 - 24
+                reclen = (
+                    reclen * 4194304
+                    + reclen3 * 16384
+                    + reclen2 * 64
+                    + reclen1 // 4
+                    - 24
+                )
 
                 # loop through rest of record
+                names = []
                 slen = 0
-                while slen < reclen:
-                    # read single 4B word for length of next variable name
-                    length = struct.unpack("I", binfp.read(4))[0]
-
-                    # read the variable name
-                    variable_name = struct.unpack(f"{length}s", binfp.read(length))[0]
-
-                    # add variable name to the set for this operation
-                    # why a set instead of a list? There should never be
-                    # a duplicate anyway
-                    vnames.setdefault((lue, group), []).append(variable_name)
-
-                    # update how far along the record we are
+                while slen < reclen and offset + recpos + 4 <= end:
+                    # single 4B word for length of next variable name
+                    (length,) = _NAME_LENGTH.unpack_from(buf, offset + recpos)
+                    names.append(
+                        buf[offset + recpos + 4 : offset + recpos + 4 + length]
+                    )
                     slen += length + 4
                     recpos += length + 4
 
+                if (
+                    slen < reclen
+                    or offset + recpos + _back_pointer_length(recpos) > end
+                ):
+                    # header record not completely written yet
+                    break
+                self.vnames.setdefault((optype, lue, group), []).extend(names)
+
             elif rectype == 1:
                 # Data record
 
                 # record should contain a value for each variable name for this
                 # operation and group
-                numvals = len(vnames[(lue, group)])
+                numvals = len(self.vnames[(optype, lue, group)])
+                recpos += _DATA_LEADER.size + 4 * numvals
+                if offset + recpos + _back_pointer_length(recpos) > end:
+                    # data record not completely written yet
+                    break
 
-                (_, level, year, month, day, hour, minute) = struct.unpack(
-                    "7I", binfp.read(28)
+                (_, level, year, month, day, hour, minute) = _DATA_LEADER.unpack_from(
+                    buf, offset + _RECORD_LEADER.size
                 )
-                recpos += 28
-
-                vals = struct.unpack(f"{numvals}f", binfp.read(4 * numvals))
-                recpos += 4 * numvals
-
-                delta = datetime.timedelta(hours=0)
-                if hour == 24:
-                    hour = 0
-
-                ndate = datetime.datetime(year, month, day, hour, minute) + delta
-
-                #  Go through labels to see if these values need to be
-                #  collected
-                for i, vname in enumerate(vnames[(lue, group)]):
-                    tmpkey = (
-                        optype.decode("ascii"),
-                        lue,
-                        group.decode("ascii"),
-                        vname.decode("ascii"),
-                        level,
-                    )
 
-                    for lbl in lablist:
-                        res = tuple_search(tmpkey, [lbl])
-                        if not res:
-                            continue
-                        labeltest.add(tuple(lbl))
-                        nres = res[0][1]
-                        ndates.add(ndate)
-                        if catalog_only is False:
-                            if intervalcode == level:
-                                collect_dict.setdefault(nres, []).append(vals[i])
-                        else:
-                            collect_dict[nres] = level
+                key = (optype, lue, group, level)
+                if key not in self.blockmap:
+                    self.blockmap[key] = self._block(*key)
+                block = self.blockmap[key]
+
+                if block is not None:
+                    if hour == 24:
+                        hour = 0
+                    ndate = datetime.datetime(year, month, day, hour, minute)
+
+                    dates = self.dates[level]
+                    offsets, blocks, dateids = self.records[level]
+                    offsets.append(offset + _RECORD_LEADER.size + _DATA_LEADER.size)
+                    blocks.append(block)
+                    dateids.append(dates.setdefault(ndate, len(dates)))
             else:
                 # there was a problem with unexpected record length
                 # back up almost all the way and try again
-                binfp.seek(-31, 1)
-
-            # calculate and skip to the end of the variable-length back pointer
-            reccnt = recpos * 4 + 1
-            if reccnt >= 256**2:
-                skbytes = 3
-            elif reccnt >= 256:
-                skbytes = 2
-            else:
-                skbytes = 1
-            binfp.read(skbytes)
+                offset -= 31
+
+            # skip to the end of the variable-length back pointer
+            offset += recpos + _back_pointer_length(recpos)
+            self.offset = offset
+
+    def keys(self, level):
+        """Return the matched keys at `level` in column order."""
+        return [key for key in self.columns if key[4] == level]
+
+
+def _decode(buf, blocks, offsets, blocknums, rows, values, first=0):
+    """Copy the values of each data record into its row of `values`."""
+    for offset, block, row in zip(offsets, blocknums, rows):
+        numvals, positions, columns = blocks[block]
+        values[row - first, columns] = np.frombuffer(
+            buf, dtype=np.float32, count=numvals, offset=offset
+        )[positions]
+
+
+def _decode_chunk(binfilename, blocks, offsets, blocknums, rows, ncolumns):
+    """Decode a chunk of data records in a worker process.
+
+    Returns the first row and the rows spanned by the chunk.
+    """
+    first = rows.min()
+    values = np.full((rows.max() - first + 1, ncolumns), np.nan, dtype=np.float32)
+    with _open_hbn(binfilename) as buf:
+        _decode(
+            buf,
+            blocks,
+            offsets.tolist(),
+            blocknums.tolist(),
+            rows.tolist(),
+            values,
+            first,
+        )
+    return first, values
+
+
+def _sorted_records(index, level):
+    """Return the sorted dates and the offset, block and row of each record."""
+    dates = list(index.dates.get(level, {}))
+    order = sorted(range(len(dates)), key=dates.__getitem__)
+    rowmap = np.empty(len(dates), dtype=np.int64)
+    rowmap[order] = np.arange(len(dates))
+
+    if not dates:
+        empty = np.empty(0, dtype=np.int64)
+        return [], empty, empty, empty
+
+    offsets, blocknums, dateids = (
+        np.frombuffer(i, dtype=np.int64).copy() for i in index.records[level]
+    )
+    return [dates[i] for i in order], offsets, blocknums, rowmap[dateids]
+
+
+def _fill(buf, index, level, workers=None, binfilename=None):
+    """Copy the indexed values at `level` into one float32 array.
+
+    Returns the sorted dates, the keys for each column and the array with
+    one row per date.  If `workers` is more than one the records are split
+    into that many chunks that are decoded in a process pool, each worker
+    mapping `binfilename` itself.
+    """
+    dates, offsets, blocknums, rows = _sorted_records(index, level)
+
+    keys = index.keys(level)
+    values = np.full((len(dates), len(keys)), np.nan, dtype=np.float32)
+
+    if dates:
+        if workers is None or workers < 2 or len(offsets) < workers:
+            _decode(
+                buf,
+                index.blocks,
+                offsets.tolist(),
+                blocknums.tolist(),
+                rows.tolist(),
+                values,
+            )
+        else:
+            # Chunks follow file order, so each one covers a short run of
+            # rows.  Neighboring chunks can share a row at their boundary.
+            chunks = np.array_split(np.arange(len(offsets)), workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        _decode_chunk,
+                        binfilename,
+                        index.blocks,
+                        offsets[chunk],
+                        blocknums[chunk],
+                        rows[chunk],
+                        len(keys),
+                    )
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    first, part = future.result()
+                    target = values[first : first + len(part)]
+                    mask = ~np.isnan(part)
+                    target[mask] = part[mask]
+
+    return dates, keys, values
+
+
+def _select_columns(index, columns):
+    """Restrict the blocks of `index` to `columns`, renumbered in that order.
 
-    if not collect_dict:
+    Returns the new blocks and whether each block has any selected columns.
+    """
+    remap = np.full(max(index.ncolumns.values()), -1, dtype=np.int64)
+    remap[columns] = np.arange(len(columns))
+
+    blocks = []
+    for numvals, positions, blockcolumns in index.blocks:
+        blockcolumns = remap[blockcolumns]
+        keep = blockcolumns >= 0
+        blocks.append((numvals, positions[keep], blockcolumns[keep]))
+    return blocks, np.array([len(i[1]) > 0 for i in blocks])
+
+
+def _iter_fill(buf, index, level, chunksize, columns=None):
+    """Yield the sorted dates and values at `level` `chunksize` rows at a time.
+
+    Only one chunk of values is held in memory at once.  If `columns` is
+    given only those column numbers are decoded, in that order.
+    """
+    dates, offsets, blocknums, rows = _sorted_records(index, level)
+    ncolumns = index.ncolumns.get(level, 0)
+    blocks = index.blocks
+    if columns is not None:
+        blocks, used = _select_columns(index, columns)
+        keep = used[blocknums]
+        offsets, blocknums, rows = offsets[keep], blocknums[keep], rows[keep]
+        ncolumns = len(columns)
+
+    order = np.argsort(rows, kind="stable")
+    sorted_rows = rows[order]
+    for first in range(0, len(dates), chunksize):
+        last = min(first + chunksize, len(dates))
+        low, high = np.searchsorted(sorted_rows, [first, last])
+        chunk = order[low:high]
+        values = np.full((last - first, ncolumns), np.nan, dtype=np.float32)
+        _decode(
+            buf,
+            blocks,
+            offsets[chunk].tolist(),
+            blocknums[chunk].tolist(),
+            rows[chunk].tolist(),
+            values,
+            first,
+        )
+        yield dates[first:last], values
+
+
+def _new_index(interval, labels):
+    """Return the interval code and an empty record index for the labels."""
+    if labels is None:
+        labels = [",,,"]
+
+    # Normalize interval code
+    try:
+        intervalcode = interval2codemap[interval.lower()]
+    except AttributeError:
+        intervalcode = None
+
+    return intervalcode, _RecordIndex(_parse_labels(labels, intervalcode))
+
+
+def _scan(buf, index):
+    """Scan the HBN buffer, raising ValueError if no labels match."""
+    from .. import tsutils
+
+    index.scan(buf)
+
+    if not index.columns:
         raise ValueError(
             tsutils.error_wrapper(
                 f"""The label specifications below matched no records in the
                 binary file.
 
-                {lablist}
+                {index.lablist}
                 """
             )
         )
 
-    ndates = sorted(list(ndates))
 
-    if catalog_only is False:
-        for lbl in lablist:
-            if tuple(lbl) not in labeltest:
-                sys.stderr.write(
-                    tsutils.error_wrapper(
-                        f"""Warning: The label '{lbl}' matched no records in
-                        the binary file.
-                        """
-                    )
+def _warn_unmatched(index):
+    """Warn about each label that did not match any record."""
+    from .. import tsutils
+
+    for lbl in index.lablist:
+        if tuple(lbl) not in index.labeltest:
+            sys.stderr.write(
+                tsutils.error_wrapper(
+                    f"""Warning: The label '{lbl}' matched no records in
+                    the binary file.
+                    """
                 )
-    else:
-        for key in collect_dict:
-            delta = ndates[1] - ndates[0] if key[4] == 2 else code2freqmap[key[4]]
-            collect_dict[key] = (
-                pd.Period(ndates[0], freq=delta),
-                pd.Period(ndates[-1], freq=delta),
             )
 
+
+def _extract_values(binfilename, interval, labels, workers=None):
+    """Return the dates, keys and float32 values array for `labels`."""
+    intervalcode, index = _new_index(interval, labels)
+    with _open_hbn(binfilename) as buf:
+        _scan(buf, index)
+        _warn_unmatched(index)
+        return _fill(buf, index, intervalcode, workers=workers, binfilename=binfilename)
+
+
+def _get_data(binfilename, interval="daily", labels=None, catalog_only=True):
+    """Underlying function to read from the binary file.  Used by
+    'extract', 'catalog'.
+    """
+    if catalog_only is False:
+        ndates, keys, values = _extract_values(binfilename, interval, labels)
+        return ndates, {key: values[:, i] for i, key in enumerate(keys)}
+
+    _, index = _new_index(interval, labels)
+    with _open_hbn(binfilename) as buf:
+        _scan(buf, index)
+
+    ndates = sorted(set().union(*index.dates.values()))
+
+    collect_dict = {}
+    for key in index.columns:
+        delta = ndates[1] - ndates[0] if key[4] == 2 else code2freqmap[key[4]]
+        collect_dict[key] = (
+            pd.Period(ndates[0], freq=delta),
+            pd.Period(ndates[-1], freq=delta),
+        )
+
     return ndates, collect_dict
 
 
-def hbn_extract(
-    hbnfilename: str,
-    interval: Literal["yearly", "monthly", "daily", "bivl"],
-    *labels,
-    sort_columns: bool = False,
-):
-    """Returns a DataFrame from a HSPF binary output file."""
+def _check_interval(interval):
+    """Return the lower case interval, raising ValueError if not valid."""
+    from .. import tsutils
+
     interval = interval.lower()
 
     if interval not in ("bivl", "daily", "monthly", "yearly"):
@@ -371,22 +635,595 @@ def hbn_extract(
             )
         )
 
-    index, data = _get_data(hbnfilename, interval, labels, catalog_only=False)
-    skeys = list(data.keys())
+    return interval
+
+
+def _column_name(key):
+    """Column name for a (operation, lue, group, variable, level) key."""
+    return f"{key[0]}_{key[1]}_{key[3]}".replace(" ", "-")
+
+
+def _to_frame(interval, index, skeys, values, sort_columns=False):
+    """Create the DataFrame returned by the extract functions.
+
+    The float32 `values` are returned as float64, the same as the values
+    unpacked one at a time by earlier versions.
+    """
     if sort_columns:
-        skeys.sort(key=lambda tup: tup[1:])
+        order = sorted(range(len(skeys)), key=lambda i: skeys[i][1:])
+        skeys = [skeys[i] for i in order]
+        values = values[:, order]
 
+    columns = [_column_name(i) for i in skeys]
     result = pd.DataFrame(
-        pd.concat(
-            [pd.Series(data[i], index=index) for i in skeys], sort=False, axis=1
-        ).reindex(pd.Index(index))
+        values.astype(np.float64), index=pd.DatetimeIndex(index), columns=columns
     )
-    columns = [f"{i[0]}_{i[1]}_{i[3]}".replace(" ", "-") for i in skeys]
-    result.columns = columns
-    if interval == "bivl":
-        result.index = result.index.to_period(result.index[1] - result.index[0])
-    else:
-        result.index = result.index.to_period()
+    if not result.index.empty:
+        freq = result.index[1] - result.index[0] if interval == "bivl" else None
+        result.index = result.index.to_period(freq)
     result.index.name = "Datetime"
 
     return result
+
+
+def hbn_extract(
+    hbnfilename: str,
+    interval: Literal["yearly", "monthly", "daily", "bivl"],
+    *labels,
+    sort_columns: bool = False,
+    workers: Optional[int] = None,
+):
+    """Returns a DataFrame from a HSPF binary output file.
+
+    Set `workers` to decode the data records in that many processes, which
+    helps with very large files.
+    """
+    interval = _check_interval(interval)
+
+    return _to_frame(
+        interval,
+        *_extract_values(hbnfilename, interval, labels, workers=workers),
+        sort_columns=sort_columns,
+    )
+
+
+def hbn_extract_multi(
+    hbnfilename: str,
+    intervals: List[Literal["yearly", "monthly", "daily", "bivl"]],
+    *labels,
+    sort_columns: bool = False,
+    workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Returns a dict of DataFrames keyed by interval from one file pass.
+
+    The same labels are extracted at every interval in `intervals`.  An
+    interval without any matching records returns an empty DataFrame.
+    `workers` is the same as in `hbn_extract`.
+    """
+    from .. import tsutils
+
+    intervals = [_check_interval(i) for i in tsutils.make_list(intervals)]
+
+    lablist = []
+    for interval in intervals:
+        lablist.extend(_parse_labels(labels, interval2codemap[interval]))
+    index = _RecordIndex(lablist)
+
+    with _open_hbn(hbnfilename) as buf:
+        _scan(buf, index)
+        _warn_unmatched(index)
+        return {
+            interval: _to_frame(
+                interval,
+                *_fill(
+                    buf,
+                    index,
+                    interval2codemap[interval],
+                    workers=workers,
+                    binfilename=hbnfilename,
+                ),
+                sort_columns=sort_columns,
+            )
+            for interval in intervals
+        }
+
+
+def _write_parquet(outfilename, interval, keys, chunks):
+    """Write the chunks as row groups of a Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [pa.field("Datetime", pa.timestamp("s"))]
+    for key in keys:
+        fields.append(
+            pa.field(
+                _column_name(key),
+                pa.float32(),
+                metadata={
+                    "operation": key[0],
+                    "lue": str(key[1]),
+                    "group": key[2],
+                    "variable": key[3],
+                },
+            )
+        )
+    schema = pa.schema(fields, metadata={"interval": interval})
+
+    with pq.ParquetWriter(outfilename, schema) as writer:
+        for dates, values in chunks:
+            arrays = [pa.array(np.array(dates, dtype="datetime64[s]"))]
+            arrays.extend(pa.array(values[:, i]) for i in range(len(keys)))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _write_npz(outfilename, interval, keys, chunks, nrows):
+    """Write the chunks into the "values" array of a NPZ file.
+
+    The dates are in "index", the column names in "columns", and the
+    "operation", "lue", "group", and "variable" arrays describe each column.
+    """
+    dates = []
+    with zipfile.ZipFile(outfilename, "w", allowZip64=True) as zfp:
+        with zfp.open("values.npy", "w", force_zip64=True) as fpo:
+            np.lib.format.write_array_header_2_0(
+                fpo,
+                {
+                    "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                    "fortran_order": False,
+                    "shape": (nrows, len(keys)),
+                },
+            )
+            for chunk_dates, values in chunks:
+                fpo.write(values.tobytes())
+                dates.extend(chunk_dates)
+
+        arrays = {
+            "index": np.array(dates, dtype="datetime64[s]"),
+            "columns": np.array([_column_name(key) for key in keys]),
+            "operation": np.array([key[0] for key in keys]),
+            "lue": np.array([key[1] for key in keys]),
+            "group": np.array([key[2] for key in keys]),
+            "variable": np.array([key[3] for key in keys]),
+            "interval": np.array(interval),
+        }
+        for name, array_ in arrays.items():
+            with zfp.open(f"{name}.npy", "w") as fpo:
+                np.lib.format.write_array(fpo, array_, allow_pickle=False)
+
+
+def _columnar_format(fmt=None):
+    """Return `fmt`, defaulting to "parquet" if pyarrow is installed."""
+    if fmt is None:
+        try:
+            import pyarrow  # noqa: F401
+
+            fmt = "parquet"
+        except ImportError:
+            fmt = "npz"
+    return fmt
+
+
+def _write_columnar(outfilename, interval, keys, chunks, nrows, fmt=None):
+    """Write the chunks as Parquet, or NPZ if pyarrow isn't installed."""
+    fmt = _columnar_format(fmt)
+
+    if fmt == "parquet":
+        _write_parquet(outfilename, interval, keys, chunks)
+    else:
+        _write_npz(outfilename, interval, keys, chunks, nrows)
+
+    return fmt
+
+
+def hbn_to_columnar(
+    hbnfilename: str,
+    outfilename: str,
+    interval: Literal["yearly", "monthly", "daily", "bivl"],
+    *labels,
+    chunksize: int = 1000,
+    fmt: Optional[Literal["parquet", "npz"]] = None,
+) -> str:
+    """Convert a HSPF binary output file to a columnar file.
+
+    Writes one float32 column for each key matched by `labels`, which
+    default to all variables (',,,').  Only `chunksize` rows of values are
+    in memory at once.  The operation, land use element, group, and
+    variable of each column are stored as metadata.
+
+    The `fmt` is "parquet" if pyarrow is installed, otherwise "npz".
+    Returns the format that was written.
+    """
+    interval = _check_interval(interval)
+
+    level = interval2codemap[interval]
+    _, index = _new_index(interval, labels or None)
+    with _open_hbn(hbnfilename) as buf:
+        _scan(buf, index)
+        _warn_unmatched(index)
+        return _write_columnar(
+            outfilename,
+            interval,
+            index.keys(level),
+            _iter_fill(buf, index, level, chunksize),
+            len(index.dates.get(level, {})),
+            fmt,
+        )
+
+
+def hbn_export(
+    hbnfilename: str,
+    outdirectory: str,
+    interval: Literal["yearly", "monthly", "daily", "bivl"],
+    *labels,
+    groupby: Literal["operation", "group"] = "operation",
+    memory_budget: int = 2**28,
+    fmt: Optional[Literal["parquet", "npz"]] = None,
+) -> Dict[str, str]:
+    """Export a HSPF binary output file to one columnar file per group.
+
+    The labels default to all variables (',,,').  Columns are grouped by
+    operation, for example "PERLND.parquet", or by operation and group, for
+    example "PERLND_PWATER.parquet", and each file is written in row chunks
+    sized so that the decoded values stay within about `memory_budget`
+    bytes.  The files have the same layout as from `hbn_to_columnar`.
+
+    Returns a dict of the output file names keyed by group name.
+    """
+    from .. import tsutils
+
+    interval = _check_interval(interval)
+    if groupby not in ("operation", "group"):
+        raise ValueError(
+            tsutils.error_wrapper(
+                f"""The "groupby" argument must be one of "operation" or
+                "group".  You supplied "{groupby}".
+                """
+            )
+        )
+    fmt = _columnar_format(fmt)
+    level = interval2codemap[interval]
+
+    _, index = _new_index(interval, labels or None)
+    os.makedirs(outdirectory, exist_ok=True)
+    outfilenames = {}
+    with _open_hbn(hbnfilename) as buf:
+        _scan(buf, index)
+        _warn_unmatched(index)
+
+        keys = index.keys(level)
+        groups = {}
+        for column, key in enumerate(keys):
+            name = key[0] if groupby == "operation" else f"{key[0]}_{key[2]}"
+            groups.setdefault(name, []).append(column)
+
+        for name, columns in groups.items():
+            # The writers hold about one more copy of each chunk.
+            chunksize = max(1, memory_budget // (8 * len(columns)))
+            outfilenames[name] = os.path.join(outdirectory, f"{name}.{fmt}")
+            _write_columnar(
+                outfilenames[name],
+                interval,
+                [keys[i] for i in columns],
+                _iter_fill(buf, index, level, chunksize, columns),
+                len(index.dates.get(level, {})),
+                fmt,
+            )
+
+    return outfilenames
+
+
+def hbn_diff(
+    basefilename: str,
+    altfilename: str,
+    interval: Literal["yearly", "monthly", "daily", "bivl"],
+    *labels,
+    chunksize: int = 1000,
+    outfilename: Optional[str] = None,
+    fmt: Optional[Literal["parquet", "npz"]] = None,
+) -> pd.DataFrame:
+    """Compare two HSPF binary output files with the same structure.
+
+    Both files are read in lockstep `chunksize` rows at a time.  Returns a
+    DataFrame with a row for each column that has the sum of the
+    differences (alternative minus base), the maximum absolute difference,
+    the root mean square difference, and the percent change of the totals.
+
+    If `outfilename` is given the difference series are also written to it
+    in the same format as `hbn_to_columnar`.
+    """
+    from .. import tsutils
+
+    interval = _check_interval(interval)
+    level = interval2codemap[interval]
+
+    _, base = _new_index(interval, labels or None)
+    _, alt = _new_index(interval, labels or None)
+    with _open_hbn(basefilename) as basebuf, _open_hbn(altfilename) as altbuf:
+        _scan(basebuf, base)
+        _scan(altbuf, alt)
+        _warn_unmatched(base)
+
+        keys = base.keys(level)
+        if keys != alt.keys(level) or list(base.dates.get(level, {})) != list(
+            alt.dates.get(level, {})
+        ):
+            raise ValueError(
+                tsutils.error_wrapper(
+                    f"""The HSPF binary files {basefilename} and {altfilename}
+                    must have the same variables and dates for the requested
+                    labels and interval.
+                    """
+                )
+            )
+
+        count = np.zeros(len(keys))
+        sum_base = np.zeros(len(keys))
+        sum_alt = np.zeros(len(keys))
+        sum_diff = np.zeros(len(keys))
+        sum_squared = np.zeros(len(keys))
+        max_abs = np.full(len(keys), np.nan)
+
+        def differences():
+            """Accumulate the statistics while yielding each chunk."""
+            for (dates, basevals), (_, altvals) in zip(
+                _iter_fill(basebuf, base, level, chunksize),
+                _iter_fill(altbuf, alt, level, chunksize),
+            ):
+                basevals = basevals.astype(np.float64)
+                altvals = altvals.astype(np.float64)
+                diff = altvals - basevals
+                valid = ~np.isnan(diff)
+                count[:] += valid.sum(axis=0)
+                sum_base[:] += np.where(valid, basevals, 0).sum(axis=0)
+                sum_alt[:] += np.where(valid, altvals, 0).sum(axis=0)
+                sum_diff[:] += np.where(valid, diff, 0).sum(axis=0)
+                sum_squared[:] += np.where(valid, diff**2, 0).sum(axis=0)
+                if len(diff):
+                    max_abs[:] = np.fmax(max_abs, np.fmax.reduce(np.abs(diff), axis=0))
+                yield dates, diff.astype(np.float32)
+
+        if outfilename is None:
+            for _ in differences():
+                pass
+        else:
+            _write_columnar(
+                outfilename,
+                interval,
+                keys,
+                differences(),
+                len(base.dates.get(level, {})),
+                fmt,
+            )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame(
+            {
+                "sum_diff": sum_diff,
+                "max_abs_diff": max_abs,
+                "rmse": np.sqrt(sum_squared / count),
+                "percent_change": 100 * (sum_alt - sum_base) / sum_base,
+            },
+            index=pd.Index([_column_name(key) for key in keys], name="Column"),
+        )
+
+
+def hbn_aggregate(
+    hbnfilename: str,
+    interval: Literal["yearly", "monthly", "daily", "bivl"],
+    *labels,
+    freq: str = "M",
+    statistics: List[Literal["sum", "mean", "min", "max", "count"]] = (
+        "sum",
+        "mean",
+        "min",
+        "max",
+    ),
+    chunksize: int = 10000,
+) -> pd.DataFrame:
+    """Aggregate HSPF binary output to calendar periods while reading.
+
+    The values at `interval` are accumulated into the pandas period
+    frequency `freq` `chunksize` rows at a time, so the full time-series
+    is never in memory.  Returns a DataFrame with a PeriodIndex and a
+    column for each combination of extracted column and statistic, named
+    "{column}::{statistic}".
+    """
+    from .. import tsutils
+
+    interval = _check_interval(interval)
+    level = interval2codemap[interval]
+    statistics = tsutils.make_list(statistics)
+    for statistic in statistics:
+        if statistic not in ("sum", "mean", "min", "max", "count"):
+            raise ValueError(
+                tsutils.error_wrapper(
+                    f"""The "statistics" must be some of "sum", "mean", "min",
+                    "max", or "count".  You supplied "{statistic}".
+                    """
+                )
+            )
+
+    periods = []
+    accumulators = {"sum": [], "count": [], "min": [], "max": []}
+
+    _, index = _new_index(interval, labels or None)
+    with _open_hbn(hbnfilename) as buf:
+        _scan(buf, index)
+        _warn_unmatched(index)
+        keys = index.keys(level)
+
+        for dates, values in _iter_fill(buf, index, level, chunksize):
+            # The dates are sorted so each period is a contiguous run of rows.
+            chunk_periods = pd.PeriodIndex(dates, freq=freq)
+            starts = np.flatnonzero(
+                np.concatenate(([True], chunk_periods[1:] != chunk_periods[:-1]))
+            )
+
+            valid = ~np.isnan(values)
+            values = values.astype(np.float64)
+            chunk = {
+                "sum": np.add.reduceat(np.where(valid, values, 0), starts),
+                "count": np.add.reduceat(valid.astype(np.int64), starts),
+                "min": np.fmin.reduceat(values, starts),
+                "max": np.fmax.reduceat(values, starts),
+            }
+
+            for row, start in enumerate(starts):
+                if periods and periods[-1] == chunk_periods[start]:
+                    # period continues from the previous chunk
+                    accumulators["sum"][-1] += chunk["sum"][row]
+                    accumulators["count"][-1] += chunk["count"][row]
+                    accumulators["min"][-1] = np.fmin(
+                        accumulators["min"][-1], chunk["min"][row]
+                    )
+                    accumulators["max"][-1] = np.fmax(
+                        accumulators["max"][-1], chunk["max"][row]
+                    )
+                    continue
+                periods.append(chunk_periods[start])
+                for name, accumulator in accumulators.items():
+                    accumulator.append(chunk[name][row])
+
+    shape = (len(periods), len(keys))
+    results = {
+        name: np.vstack(accumulator) if accumulator else np.empty(shape)
+        for name, accumulator in accumulators.items()
+    }
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results["mean"] = np.where(
+            results["count"] > 0, results["sum"] / results["count"], np.nan
+        )
+
+    columns = [_column_name(key) for key in keys]
+    result = pd.DataFrame(
+        np.stack([results[i] for i in statistics], axis=-1).reshape(
+            len(periods), len(keys) * len(statistics)
+        ),
+        index=pd.PeriodIndex(periods, freq=freq, name="Datetime"),
+        columns=[
+            tsutils.renamer(column, statistic)
+            for column in columns
+            for statistic in statistics
+        ],
+    )
+    return result
+
+
+def hbn_extract_files(
+    hbnfilenames: List[str],
+    interval: Literal["yearly", "monthly", "daily", "bivl"],
+    *labels,
+    sort_columns: bool = False,
+    workers: Optional[int] = None,
+    merge: bool = True,
+) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Extract the same labels from many HSPF binary output files.
+
+    The files are extracted concurrently in a pool of `workers` processes,
+    which defaults to the number of processors.  If `merge` is True returns
+    one DataFrame with columns named "{file}.{column}" where "file" is the
+    file name without extension, or the full path without extension if
+    file names are repeated.  Otherwise returns a dict of DataFrames keyed
+    by the file names as given.
+    """
+    interval = _check_interval(interval)
+    hbnfilenames = [str(i) for i in hbnfilenames]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                hbn_extract, hbnfilename, interval, *labels, sort_columns=sort_columns
+            )
+            for hbnfilename in hbnfilenames
+        ]
+        results = {
+            hbnfilename: future.result()
+            for hbnfilename, future in zip(hbnfilenames, futures)
+        }
+
+    if not merge:
+        return results
+
+    prefixes = [os.path.splitext(os.path.basename(i))[0] for i in hbnfilenames]
+    if len(set(prefixes)) < len(prefixes):
+        prefixes = [os.path.splitext(i)[0] for i in hbnfilenames]
+
+    frames = []
+    for prefix, result in zip(prefixes, results.values()):
+        result.columns = [f"{prefix}.{i}" for i in result.columns]
+        frames.append(result)
+    return pd.concat(frames, axis="columns")
+
+
+class HbnTail:
+    """Follow a HBN file that is still being written by a running model.
+
+    Each call to `refresh` scans only the records appended since the last
+    call, starting at the offset of the first record that was not complete,
+    and decodes them into arrays that grow as needed.  The labels default
+    to all variables (',,,').
+    """
+
+    def __init__(
+        self,
+        hbnfilename: str,
+        interval: Literal["yearly", "monthly", "daily", "bivl"],
+        *labels,
+    ):
+        self.hbnfilename = hbnfilename
+        self.interval = _check_interval(interval)
+        self._level = interval2codemap[self.interval]
+        self._index = _RecordIndex(_parse_labels(labels or [",,,"], self._level))
+        self._decoded = 0
+        self._values = np.full((0, 0), np.nan, dtype=np.float32)
+
+    def _grow(self, nrows, ncolumns):
+        """Make room for `nrows` and `ncolumns`, doubling the rows."""
+        rows, columns = self._values.shape
+        if nrows <= rows and ncolumns <= columns:
+            return
+        values = np.full(
+            (max(nrows, 2 * rows), max(ncolumns, columns)), np.nan, dtype=np.float32
+        )
+        values[:rows, :columns] = self._values
+        self._values = values
+
+    def refresh(self) -> int:
+        """Read newly appended records and return how many were decoded."""
+        if os.path.getsize(self.hbnfilename) <= self._index.offset:
+            return 0
+
+        with _open_hbn(self.hbnfilename) as buf:
+            self._index.scan(buf)
+            if self._level not in self._index.records:
+                return 0
+
+            offsets, blocknums, dateids = self._index.records[self._level]
+            self._grow(
+                len(self._index.dates[self._level]), self._index.ncolumns[self._level]
+            )
+            _decode(
+                buf,
+                self._index.blocks,
+                offsets[self._decoded :],
+                blocknums[self._decoded :],
+                dateids[self._decoded :],
+                self._values,
+            )
+
+        count = len(offsets) - self._decoded
+        self._decoded = len(offsets)
+        return count
+
+    def frame(self, sort_columns: bool = False) -> pd.DataFrame:
+        """Return a DataFrame of everything read so far."""
+        dates = list(self._index.dates.get(self._level, {}))
+        order = sorted(range(len(dates)), key=dates.__getitem__)
+        values = self._values[order, : self._index.ncolumns.get(self._level, 0)]
+        return _to_frame(
+            self.interval,
+            [dates[i] for i in order],
+            self._index.keys(self._level),
+            values,
+            sort_columns=sort_columns,
+        )
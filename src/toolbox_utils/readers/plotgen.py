@@ -1,55 +1,160 @@
 """For reading HSPF plotgen files."""
 
 import datetime
+import itertools
+import os
 
+import numpy as np
 import pandas as pd
 
 _END_OF_HEADER = 25
 
 
-def plotgen_extract(filename):
-    """Reads HSPF PLTGEN files and creates a DataFrame."""
+def _header_columns(lines):
+    """Return the curve labels from the PLTGEN header lines."""
     foundcols = False
     cols = []
-    lst = []
-    with open(filename, encoding="ascii") as fpointer:
-        for i, line in enumerate(fpointer):
-            if i < _END_OF_HEADER:
-                if "LINTYP" in line:
-                    foundcols = True
-                elif line[5:].startswith("Time series"):
-                    foundcols = False
-                elif foundcols:
-                    if header := line[4:30].strip():
-                        cols.append(header)
-                    else:
-                        foundcols = False
-
-            if i > _END_OF_HEADER:
-                year, month, day, hour, minute = line[4:22].split()
-
-                if int(hour) == 24:
-                    day = [
-                        datetime.datetime(int(year), int(month), int(day), tzinfo=None)
-                        + datetime.timedelta(days=1)
-                    ]
-                else:
-                    day = [
-                        datetime.datetime(
-                            int(year),
-                            int(month),
-                            int(day),
-                            int(hour),
-                            int(minute),
-                            tzinfo=None,
-                        )
-                    ]
-                data = [float(x) for x in line[23:].split()]
-                lst.append(day + data)
-
-    pgdf = pd.DataFrame(lst)
-    pgdf.columns = ["Datetime"] + cols
-    pgdf = pgdf.set_index(["Datetime"])
-    pgdf.index = pd.DatetimeIndex(pgdf.index)
-
-    return pgdf
+    for line in lines:
+        if "LINTYP" in line:
+            foundcols = True
+        elif line[5:].startswith("Time series"):
+            foundcols = False
+        elif foundcols:
+            if header := line[4:30].strip():
+                cols.append(header)
+            else:
+                foundcols = False
+    return cols
+
+
+def _parse_data(lines, cols, numbers=None):
+    """Parse PLTGEN data lines into a DataFrame.
+
+    The four character label at the start of each line is dropped and the
+    rest is converted by `numpy.loadtxt` as whitespace delimited columns
+    of year, month, day, hour, minute, and one value for each curve.  If
+    `numbers` is given only those curves are converted.
+    """
+    if numbers is None:
+        numbers = list(range(len(cols)))
+    usecols = [0, 1, 2, 3, 4] + [5 + i for i in numbers]
+
+    table = np.empty((0, len(usecols)))
+    if lines:
+        table = np.loadtxt(
+            (line[4:] for line in lines), ndmin=2, dtype=np.float64, usecols=usecols
+        ).reshape(-1, len(usecols))
+    year, month, day, hour, minute = table[:, :5].astype(np.int64).T
+
+    # HSPF writes midnight as hour 24 of the previous day.
+    hour24 = hour == 24
+    index = (
+        (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (month - 1)
+    ).astype("datetime64[D]") + (day - 1 + hour24)
+    index = index.astype("datetime64[m]") + np.where(hour24, 0, hour * 60 + minute)
+
+    return pd.DataFrame(
+        table[:, 5:],
+        index=pd.DatetimeIndex(index.astype("datetime64[ns]"), name="Datetime"),
+        columns=[cols[i] for i in numbers],
+    )
+
+
+def _read_header(fpointer):
+    """Read the header lines and return the curve labels."""
+    return _header_columns(
+        [fpointer.readline().decode("ascii") for _ in range(_END_OF_HEADER)]
+    )
+
+
+def plotgen_columns(filename):
+    """Return the curve labels of a HSPF PLTGEN file from the header only."""
+    with open(filename, "rb") as fpointer:
+        return _read_header(fpointer)
+
+
+def _line_date(line):
+    """Return the date of a PLTGEN data line, as bytes, or None if blank."""
+    fields = line[4:22].split()
+    if not fields:
+        return None
+    year, month, day, hour, minute = (int(i) for i in fields)
+    if hour == 24:
+        return datetime.datetime(year, month, day) + datetime.timedelta(days=1)
+    return datetime.datetime(year, month, day, hour, minute)
+
+
+def _data_range(fpointer, start_date=None, end_date=None, columns=None):
+    """Read the header and find the byte range of the requested dates.
+
+    Returns the curve labels, the curve numbers to convert, and the start
+    and stop byte offsets of the data lines.
+    """
+    from .. import tsutils
+
+    cols = _read_header(fpointer)
+    numbers = None
+    if columns:
+        numbers = tsutils._column_positions(cols, tsutils.make_list(columns))
+
+    # skip the first data line, which is before the simulation starts
+    fpointer.readline()
+
+    data_start = fpointer.tell()
+    size = fpointer.seek(0, os.SEEK_END)
+    start = data_start
+    if start_date is not None:
+        start = tsutils._bisect_lines(
+            fpointer, data_start, size, pd.Timestamp(start_date), _line_date
+        )
+    stop = size
+    if end_date is not None:
+        stop = tsutils._bisect_lines(
+            fpointer, start, size, pd.Timestamp(end_date), _line_date, after=True
+        )
+
+    return cols, numbers, start, max(start, stop)
+
+
+def plotgen_extract(filename, start_date=None, end_date=None, columns=None):
+    """Reads HSPF PLTGEN files and creates a DataFrame.
+
+    If `start_date` or `end_date` are given, the file is searched by byte
+    offset for the first and last lines in that window and only those
+    lines are parsed.  The `columns` are a list of curve labels or numbers,
+    starting at 1, and only those curves are converted to floats.
+    """
+    with open(filename, "rb") as fpointer:
+        cols, numbers, start, stop = _data_range(
+            fpointer, start_date, end_date, columns
+        )
+        fpointer.seek(start)
+        data = fpointer.read(stop - start).decode("ascii")
+
+    return _parse_data(data.splitlines(keepends=True), cols, numbers)
+
+
+def plotgen_iter(
+    filename, chunksize=100000, start_date=None, end_date=None, columns=None
+):
+    """Yield DataFrames of at most `chunksize` rows from a HSPF PLTGEN file.
+
+    The `start_date`, `end_date`, and `columns` are the same as for
+    `plotgen_extract`.  Only one chunk of lines is in memory at a time.
+    """
+    with open(filename, "rb") as fpointer:
+        cols, numbers, start, stop = _data_range(
+            fpointer, start_date, end_date, columns
+        )
+        fpointer.seek(start)
+        position = start
+        while position < stop:
+            lines = []
+            for line in itertools.islice(fpointer, chunksize):
+                lines.append(line.decode("ascii"))
+                position += len(line)
+                if position >= stop:
+                    break
+            if not lines:
+                break
+            yield _parse_data(lines, cols, numbers)
@@ -0,0 +1,269 @@
+"""For reading URL sources over HTTP."""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+
+_MAX_REDIRECTS = 10
+
+
+def _proxy(scheme, netloc):
+    """
+    Return the proxy URL for `scheme` and `netloc`, or None.
+
+    The proxies are found by urllib, from the HTTP_PROXY, HTTPS_PROXY, and
+    NO_PROXY environment variables or the system settings.
+    """
+    proxy = getproxies().get(scheme)
+    if not proxy or proxy_bypass(netloc):
+        return None
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
+def _proxy_headers(proxy):
+    """Return the Proxy-Authorization header for the user in `proxy`."""
+    parts = urlsplit(proxy)
+    if parts.username is None:
+        return {}
+    credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+    return {
+        "Proxy-Authorization": f"Basic {base64.b64encode(credentials.encode()).decode()}"
+    }
+
+
+def _connect(scheme, netloc, timeout, proxy=None):
+    """
+    Return a new HTTP or HTTPS connection to `netloc`.
+
+    With a `proxy`, HTTP requests are sent to it and HTTPS requests go
+    through a CONNECT tunnel to `netloc`.
+    """
+    if proxy is None:
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=timeout)
+        return http.client.HTTPConnection(netloc, timeout=timeout)
+
+    parts = urlsplit(proxy)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    if scheme == "https":
+        connection = http.client.HTTPSConnection(parts.hostname, port, timeout=timeout)
+        connection.set_tunnel(netloc, headers=_proxy_headers(proxy))
+        return connection
+    return http.client.HTTPConnection(parts.hostname, port, timeout=timeout)
+
+
+def _request(connection, target, headers):
+    """Send a GET request and return the response and the whole body."""
+    connection.request("GET", target, headers=headers)
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def url_get(url, headers=None, pool=None, timeout=60):
+    """
+    GET `url` and return the status, the response headers, and the body.
+
+    Connections are taken from and returned to `pool`, a dictionary of the
+    idle connections to each host, so later requests to the same host
+    reuse them.  Redirects are followed and gzip or deflate content is
+    decoded.  A status of 400 or more raises urllib.error.HTTPError.  Only
+    http and https URLs can be fetched, and the proxies in the environment
+    are used the same as by urllib.
+    """
+    pool = {} if pool is None else pool
+    for _ in range(_MAX_REDIRECTS):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Only http and https URLs can be fetched, not {url}.")
+        host = (parts.scheme, parts.netloc)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        request_headers = {"Accept-Encoding": "gzip, deflate", **(headers or {})}
+        proxy = _proxy(*host)
+        if proxy is not None and parts.scheme == "http":
+            target = f"http://{parts.netloc}{target}"
+            request_headers.update(_proxy_headers(proxy))
+
+        try:
+            connection = pool.setdefault(host, []).pop()
+            reused = True
+        except IndexError:
+            connection = _connect(*host, timeout, proxy)
+            reused = False
+        try:
+            response, body = _request(connection, target, request_headers)
+        except (http.client.HTTPException, ConnectionError):
+            # The server may have closed an idle connection.
+            connection.close()
+            if not reused:
+                raise
+            connection = _connect(*host, timeout, proxy)
+            response, body = _request(connection, target, request_headers)
+
+        if response.will_close:
+            connection.close()
+        else:
+            pool[host].append(connection)
+
+        location = response.getheader("Location")
+        if response.status in _REDIRECTS and location:
+            url = urljoin(url, location)
+            continue
+        if response.status >= 400:
+            raise HTTPError(
+                url, response.status, response.reason, response.headers, None
+            )
+
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        return response.status, response.headers, body
+
+    raise HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+
+def close_pool(pool):
+    """Close the idle connections in `pool`."""
+    for connections in pool.values():
+        for connection in connections:
+            connection.close()
+    pool.clear()
+
+
+def _cache_name(url):
+    """Return the start of the names of the cached files of `url`."""
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _body_path(cache_dir, url, version):
+    """Return the path of the stored body of `url` with the hash `version`."""
+    return Path(cache_dir) / f"{_cache_name(url)}-{version}.http"
+
+
+def _write(path, data):
+    """Replace the contents of `path` with `data` in one step."""
+    fd, tmpname = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fpointer:
+            fpointer.write(data)
+        os.replace(tmpname, path)
+    except OSError:
+        with suppress(OSError):
+            os.remove(tmpname)
+        raise
+
+
+def url_cache_get(url, cache_dir, ttl=0, pool=None, timeout=60):
+    """
+    GET `url` through the HTTP cache in `cache_dir`.
+
+    The body is stored with its ETag and Last-Modified headers.  For `ttl`
+    seconds after it was last checked the stored body is used without a
+    request, after that a conditional request revalidates it and a "304
+    Not Modified" response uses the stored body.  Returns the body and its
+    SHA-256 hash, which changes only when the body does.
+
+    Each body is stored under its hash and is never changed, then the
+    headers, with the hash of their body, replace the old ones in one
+    step.  So processes sharing `cache_dir` always pair a body with its
+    own headers.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = Path(cache_dir) / f"{_cache_name(url)}.json"
+
+    meta = {}
+    with suppress(OSError, ValueError):
+        meta = json.loads(meta_path.read_text())
+    body = None
+    body_path = None
+    if meta.get("url") == url and "version" in meta:
+        body_path = _body_path(cache_dir, url, meta["version"])
+        with suppress(OSError):
+            body = body_path.read_bytes()
+
+    if body is not None and time.time() - meta.get("checked", 0) < ttl:
+        # The modification time orders the files for eviction.
+        with suppress(OSError):
+            os.utime(body_path)
+        return body, meta["version"]
+
+    headers = {}
+    if body is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    status, response_headers, data = url_get(url, headers, pool, timeout)
+
+    if status == 304 and body is not None:
+        with suppress(OSError):
+            os.utime(body_path)
+    else:
+        body = data
+        meta = {
+            "url": url,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "version": hashlib.sha256(body).hexdigest(),
+        }
+        new_path = _body_path(cache_dir, url, meta["version"])
+        if not new_path.exists():
+            _write(new_path, body)
+    meta["checked"] = time.time()
+    _write(meta_path, json.dumps(meta).encode())
+
+    if body_path is not None and body_path != _body_path(
+        cache_dir, url, meta["version"]
+    ):
+        # A reader still holding the old headers finds no body and fetches.
+        with suppress(OSError):
+            body_path.unlink()
+    return body, meta["version"]
+
+
+async def url_get_all(urls, max_connections=8, cache_dir=None, ttl=0, timeout=60):
+    """
+    GET all of the `urls` concurrently.
+
+    At most `max_connections` requests are made at the same time, and the
+    connections to each host are reused by the later requests to that host.
+    If `cache_dir` is given the requests go through the HTTP cache of
+    `url_cache_get`.  Returns a dictionary of the body and the version of
+    each URL, where the version is None without `cache_dir`.
+    """
+    urls = list(dict.fromkeys(urls))
+    loop = asyncio.get_running_loop()
+    pool = {}
+
+    def get(url):
+        if cache_dir is None:
+            return url_get(url, pool=pool, timeout=timeout)[2], None
+        return url_cache_get(url, cache_dir, ttl, pool, timeout)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_connections) as executor:
+            responses = await asyncio.gather(
+                *(loop.run_in_executor(executor, get, url) for url in urls)
+            )
+    finally:
+        close_pool(pool)
+    return dict(zip(urls, responses))
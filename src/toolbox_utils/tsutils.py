@@ -1,24 +1,43 @@
 """A collection of functions used by toolbox_utils, wdmtoolbox, ...etc."""
 
+import asyncio
+import base64
 import bz2
 import datetime
 import gzip
+import hashlib
 import inspect
 import os
+import pickle
 import platform
 import re
+import stat
 import sys
+import tempfile
+import threading
 from ast import literal_eval
 from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import suppress
-from functools import reduce, wraps
+from contextvars import ContextVar, copy_context
+from functools import partial, reduce, wraps
 from importlib.metadata import distribution
 from io import BytesIO, StringIO, TextIOWrapper
 from math import gcd
 from pathlib import Path
 from string import Template
 from textwrap import TextWrapper, dedent
-from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
 
 import dateparser
@@ -39,8 +58,11 @@ from scipy.stats.distributions import lognorm, norm
 from tabulate import simple_separated_format
 from tabulate import tabulate as tb
 
+from .readers.columnar import columnar_extract as columnar
 from .readers.hbn import hbn_extract as hbn
 from .readers.plotgen import plotgen_extract as plotgen
+from .readers.plotgen import plotgen_iter
+from .readers.url import close_pool, url_cache_get, url_get_all
 from .readers.wdm import wdm_extract as wdm
 
 # This is here so that linters don't remove the pint_pandas import which is
@@ -451,7 +473,14 @@ docstrings = {
 
         The table format.  Can be one of 'csv', 'tsv', 'plain', 'simple',
         'grid', 'pipe', 'orgtbl', 'rst', 'mediawiki', 'latex', 'latex_raw'
-        and 'latex_booktabs'.""",
+        and 'latex_booktabs'.
+
+        To pipe to another toolbox the binary formats 'arrow', an Arrow IPC
+        stream, or 'npy', a sequence of NumPy arrays, can be used.  They
+        keep full precision and are read from standard input without
+        parsing.  Setting the TOOLBOX_UTILS_PIPE_FORMAT environment variable
+        to 'arrow' or 'npy' uses that format instead of 'csv' when standard
+        output is a pipe, not a terminal or a file.""",
     "header": """header : str
         [optional, default is 'default', output format]
 
@@ -1497,6 +1526,10 @@ def common_kwds(
     if por or force_freq:
         dropna = "no"
 
+    # Let the readers parse only the picked columns.
+    if pick and usecols is None and names is None:
+        usecols, pick = pick, None
+
     ntsd = read_iso_ts(
         input_tsd,
         parse_dates=parse_dates,
@@ -1506,6 +1539,8 @@ def common_kwds(
         index_type=index_type,
         usecols=usecols,
         clean=clean,
+        start_date=start_date,
+        end_date=end_date,
     )
 
     if names is not None:
@@ -1637,6 +1672,95 @@ def _pick(tsd: DataFrame, columns: List[Union[str, int]]) -> DataFrame:
     return newtsd
 
 
+def _column_positions(
+    names: List, columns: List[Union[str, int]], strict: bool = True
+) -> Optional[List[int]]:
+    """
+    Return the positions in `names` of the `columns` names or numbers.
+
+    Parameters
+    ----------
+    names
+        The data column names.
+    columns
+        Column names or numbers, where the first data column is 1, the same
+        as for `_pick`.
+    strict
+        If True raise a ValueError for a column that isn't in `names`,
+        otherwise return None.
+
+    Returns
+    -------
+    positions
+        The positions in `names`, starting at 0, in the order of `columns`.
+    """
+    names = list(names)
+    positions = []
+    for column in columns:
+        if column in names:
+            positions.append(names.index(column))
+            continue
+        try:
+            number = int(column) - 1
+        except ValueError as exc:
+            if not strict:
+                return None
+            raise ValueError(
+                error_wrapper(
+                    f"""
+                    The name {column} isn't in the list of column names
+                    {names}.
+                    """
+                )
+            ) from exc
+        if number < 0 or number >= len(names):
+            if not strict:
+                return None
+            raise ValueError(
+                error_wrapper(
+                    f"""
+                    The column number {column} must be from 1 to the number
+                    of columns {len(names)}.
+                    """
+                )
+            )
+        positions.append(number)
+    return positions
+
+
+def _reader_usecols(
+    header: List, columns: List[Union[str, int]]
+) -> Optional[List[int]]:
+    """
+    Return the reader column positions of the `columns` to pick.
+
+    Parameters
+    ----------
+    header
+        The column names of the source, with the index column first.
+    columns
+        Column names or numbers, where the first data column is 1, the same
+        as for `_pick`.
+
+    Returns
+    -------
+    positions
+        The positions in `header` of `columns`, in the order of `columns`.
+        None if a column isn't a data column of `header` or is picked more
+        than once, so the whole source is read and `_pick` sorts it out.
+    """
+    positions = _column_positions(list(header)[1:], columns, strict=False)
+    if positions is None or len(set(positions)) != len(positions):
+        return None
+    return [i + 1 for i in positions]
+
+
+def _reorder(tsd: DataFrame, positions: List[int]) -> DataFrame:
+    """Put columns read in file order back into the picked order."""
+    order = sorted(positions)
+    return tsd.iloc[:, [order.index(i) for i in positions]]
+
+
 def _date_slice(
     input_tsd: DataFrame,
     start_date: Optional[str] = None,
@@ -2002,6 +2126,139 @@ def _apply_across_columns(func, xtsd, **kwds):
     return xtsd
 
 
+_PIPE_MAGIC = {"arrow": b"TBU:ARW\n", "npy": b"TBU:NPY\n"}
+
+
+def _npy_values(values) -> ndarray:
+    """Return column or index values as a NumPy array without objects."""
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = pd.DatetimeIndex(values).tz_convert(None)
+    if pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(
+        values.dtype, np.dtype
+    ):
+        return values.to_numpy(dtype="float64", na_value=np.nan)
+    values = np.asarray(values)
+    if values.dtype.kind == "O":
+        values = values.astype(str)
+    return values
+
+
+def _write_npy(out, array: ndarray):
+    """Write `array` in NPY format to a stream that may be a pipe."""
+    array = np.ascontiguousarray(array)
+    np.lib.format.write_array_header_2_0(
+        out, np.lib.format.header_data_from_array_1_0(array)
+    )
+    out.write(array.tobytes())
+
+
+def _write_npy_values(out, values):
+    """Write column or index values, then the missing value mask of text."""
+    array = _npy_values(values)
+    _write_npy(out, array)
+    if array.dtype.kind == "U":
+        _write_npy(out, np.asarray(pd.isna(values), dtype=bool))
+
+
+def _read_npy_values(buffer) -> ndarray:
+    """Read values written by `_write_npy_values`, text missing as None."""
+    values = _read_npy(buffer)
+    if values.dtype.kind == "U":
+        missing = _read_npy(buffer)
+        if missing.any():
+            values = values.astype(object)
+            values[missing] = None
+    return values
+
+
+def _read_npy(buffer) -> ndarray:
+    """Read an array in NPY format from a stream that may be a pipe."""
+    if np.lib.format.read_magic(buffer) == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(buffer)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(buffer)
+    count = int(np.prod(shape))
+    return np.frombuffer(buffer.read(count * dtype.itemsize), dtype=dtype).reshape(
+        shape
+    )
+
+
+def _write_pipe(tsd: DataFrame, fmt: str):
+    """
+    Write `tsd` to standard output as a binary stream for `read_iso_ts`.
+
+    The stream starts with a magic header, then is either an Arrow IPC
+    stream or, if `fmt` is "npy" or pyarrow isn't installed, the column
+    names, the index, and each column written as NPY arrays, with text
+    followed by a boolean array of its missing values.  A time zone
+    aware index is written as UTC with the time zone added to its name.  A
+    PeriodIndex is written as the start timestamps, which is what a CSV
+    pipe of the same DataFrame is read as.
+    """
+    if isinstance(tsd.index, pd.PeriodIndex):
+        tsd = tsd.set_axis(tsd.index.to_timestamp(), axis="index")
+
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            fmt = "npy"
+
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    out.write(_PIPE_MAGIC[fmt])
+    if fmt == "arrow":
+        table = pa.Table.from_pandas(tsd)
+        with pa.ipc.new_stream(out, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        index_name = str(tsd.index.name)
+        if getattr(tsd.index, "tz", None) is not None:
+            index_name = f"{index_name.split(':')[0]}:{tsd.index.tz}"
+        _write_npy(out, np.array([index_name, *(str(i) for i in tsd.columns)]))
+        _write_npy_values(out, tsd.index)
+        for column in range(len(tsd.columns)):
+            _write_npy_values(out, tsd.iloc[:, column])
+    out.flush()
+
+
+def _read_pipe(stream) -> Optional[DataFrame]:
+    """Return the DataFrame of a binary `printiso` stream, or None if text."""
+    buffer = getattr(stream, "buffer", None)
+    if not hasattr(buffer, "peek"):
+        return None
+    magic = buffer.peek(8)[:8]
+    fmt = next((k for k, v in _PIPE_MAGIC.items() if v == magic), None)
+    if fmt is None:
+        return None
+
+    buffer.read(8)
+    if fmt == "arrow":
+        import pyarrow as pa
+
+        return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+    names = _read_npy(buffer)
+    index = pd.Index(_read_npy_values(buffer), name=str(names[0]))
+    if isinstance(index, pd.DatetimeIndex) and ":" in index.name:
+        name, tz = index.name.split(":", 1)
+        index = index.tz_localize("UTC").tz_convert(tz).rename(name)
+    tsd = pd.DataFrame(
+        {i: _read_npy_values(buffer) for i in range(len(names) - 1)}, index=index
+    )
+    tsd.columns = [str(i) for i in names[1:]]
+    return tsd
+
+
+def _stdout_is_pipe() -> bool:
+    """Return True if standard output is a binary capable pipe."""
+    try:
+        mode = os.fstat(sys.stdout.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) and hasattr(sys.stdout, "buffer")
+
+
 def _printiso(
     tsd: DataFrame,
     date_format: Optional[Any] = None,
@@ -2030,6 +2287,21 @@ def _printiso(
     elif isinstance(tsd, (int, float, tuple, np.ndarray)):
         tablefmt = None
 
+    if (
+        tablefmt == "csv"
+        and os.environ.get("TOOLBOX_UTILS_PIPE_FORMAT") in _PIPE_MAGIC
+        and _stdout_is_pipe()
+    ):
+        tablefmt = os.environ["TOOLBOX_UTILS_PIPE_FORMAT"]
+
+    if tablefmt in _PIPE_MAGIC and not hasattr(sys.stdout, "buffer"):
+        tablefmt = "csv"
+
+    if tablefmt in _PIPE_MAGIC and isinstance(tsd, pd.DataFrame):
+        with suppress(OSError):
+            _write_pipe(tsd, tablefmt)
+        return
+
     ntablefmt = None
 
     if tablefmt in ("csv", "tsv", "csv_nos", "tsv_nos"):
@@ -2174,6 +2446,974 @@ def is_valid_url(url: Union[bytes, str], qualifying: Optional[Any] = None) -> bo
     return all(getattr(token, qualifying_attr) for qualifying_attr in qualifying)
 
 
+def _csv_engine(sep: Optional[str], kwds: Dict) -> str:
+    """Return the fastest pandas.read_csv engine that supports the options.
+
+    The C engine can't sniff the separator, use regular expression
+    separators, or skip footer lines.
+    """
+    if sep is None or (len(sep) > 1 and sep != r"\s+"):
+        return "python"
+    if kwds.get("skipfooter") or kwds.get("engine") == "python":
+        return "python"
+    return kwds.get("engine", "c")
+
+
+def _read_csv(fpi, sep: Optional[str] = ",", **kwds) -> pd.DataFrame:
+    """Read CSV with the C engine, falling back to the python engine.
+
+    The C engine uses "round_trip" float conversion so values are the same
+    as from the python engine.  If the C engine can't parse the input it is
+    read again with the python engine, so streams that can't seek, like
+    standard input, are read into memory first unless reading in chunks.
+    """
+    engine = _csv_engine(sep, kwds)
+    kwds.pop("engine", None)
+    if engine != "python":
+        seekable = hasattr(fpi, "seekable") and fpi.seekable()
+        if hasattr(fpi, "read") and not seekable and kwds.get("chunksize") is None:
+            fpi = StringIO(fpi.read())
+            seekable = True
+        position = fpi.tell() if seekable else None
+        ckwds = dict(kwds)
+        if engine == "c":
+            ckwds.setdefault("float_precision", "round_trip")
+        try:
+            return pd.read_csv(fpi, engine=engine, sep=sep, **ckwds)
+        except (ValueError, pd.errors.ParserError):
+            if position is not None:
+                fpi.seek(position)
+            elif hasattr(fpi, "read"):
+                raise
+    return pd.read_csv(fpi, engine="python", sep=sep, **kwds)
+
+
+# Local CSV files at least this many bytes are parsed in parallel.
+_PARALLEL_CSV_SIZE = 2**26
+
+# Bytes at the start of a CSV file, and around each split, checked for quotes.
+_PARALLEL_CSV_SAMPLE = 2**16
+
+
+def _csv_ranges(fname: str, parts: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Return the header line and `parts` byte ranges of the data lines.
+
+    Each range starts at the beginning of a line.  A quoted value could
+    have a new line in it, so no ranges are returned, to read the file in
+    one piece, if there is a quote in the sampled bytes at the start of the
+    data or around any split.  A quoted new line that isn't near the start
+    or a split is still a line boundary.
+    """
+    with open(fname, "rb") as fpointer:
+        header = fpointer.readline()
+        data_start = fpointer.tell()
+        if b'"' in header + fpointer.read(_PARALLEL_CSV_SAMPLE):
+            return header, []
+        size = fpointer.seek(0, os.SEEK_END)
+        bounds = [data_start]
+        for part in range(1, parts):
+            pos = data_start + (size - data_start) * part // parts
+            pos = max(pos, bounds[-1])
+            if pos < size:
+                fpointer.seek(max(pos - _PARALLEL_CSV_SAMPLE // 2, data_start))
+                if b'"' in fpointer.read(_PARALLEL_CSV_SAMPLE):
+                    return header, []
+                fpointer.seek(pos)
+                fpointer.readline()
+                pos = fpointer.tell()
+            bounds.append(min(pos, size))
+        bounds.append(size)
+    ranges = [(i, j) for i, j in zip(bounds[:-1], bounds[1:]) if j > i]
+    return header, ranges
+
+
+def _read_csv_range(fname: str, header: bytes, start: int, stop: int, kwds: Dict):
+    """Parse the lines from `start` to `stop` of a CSV file with `header`."""
+    with open(fname, "rb") as fpointer:
+        fpointer.seek(start)
+        data = fpointer.read(stop - start)
+    return _read_csv(BytesIO(header + data), **kwds)
+
+
+def _csv_workers() -> int:
+    """
+    Return the number of processes to parse a large local CSV file with.
+
+    Set by the TOOLBOX_UTILS_CSV_WORKERS environment variable, where 1
+    turns parallel parsing off, otherwise the number of processors.  Off
+    the main thread, as in `aread_iso_ts`, it is always 1 because forking
+    a process that is running other threads can deadlock.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return 1
+    return int(os.environ.get("TOOLBOX_UTILS_CSV_WORKERS", os.cpu_count() or 1))
+
+
+def _read_csv_parallel(
+    fname: str, workers: Optional[int] = None, **kwds
+) -> pd.DataFrame:
+    """
+    Read a CSV file by parsing byte ranges in separate processes.
+
+    The file is split at line boundaries into one range per worker, each
+    range is parsed with the header line and the same keywords by
+    `_read_csv`, and the pieces are concatenated in file order.  The file
+    must not be compressed.
+    """
+    workers = workers or os.cpu_count() or 1
+    header, ranges = _csv_ranges(fname, workers)
+    if len(ranges) < 2:
+        return _read_csv(fname, **kwds)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        pieces = list(
+            pool.map(
+                _read_csv_range,
+                *zip(*((fname, header, start, stop, kwds) for start, stop in ranges)),
+            )
+        )
+    return pd.concat(pieces)
+
+
+def _csv_line_date(line: bytes, sep: bytes) -> Optional[pd.Timestamp]:
+    """Return the date of a CSV data line, or None for a blank line."""
+    field = line.split(sep, 1)[0].strip()
+    if not field:
+        return None
+    date = pd.Timestamp(field.decode())
+    if date.tzinfo is not None:
+        raise ValueError("Dates with time zones are compared after parsing.")
+    return date
+
+
+def _line_at(fpointer, pos: int, data_start: int) -> Tuple[int, bytes]:
+    """Return the offset and contents of the first line at or after `pos`."""
+    if pos > data_start:
+        fpointer.seek(pos - 1)
+        fpointer.readline()
+    else:
+        fpointer.seek(pos)
+    start = fpointer.tell()
+    return start, fpointer.readline()
+
+
+def _bisect_lines(
+    fpointer,
+    data_start: int,
+    size: int,
+    date,
+    line_date: Callable,
+    after: bool = False,
+    probes: Optional[Dict] = None,
+) -> int:
+    """
+    Return the byte offset of the first line on or after `date`.
+
+    Parameters
+    ----------
+    fpointer
+        A file opened in binary mode.
+    data_start
+        The byte offset of the first line to search.
+    size
+        The byte offset of the end of the lines to search.
+    date
+        The date to search for.
+    line_date
+        Returns the date of a line, as bytes, or None for a blank line,
+        which is taken to be after every date.
+    after
+        If True, the offset of the first line after `date`.
+    probes
+        If given, the date of every line looked at is added by its offset
+        so the caller can check that the lines are sorted.
+
+    Returns
+    -------
+    offset
+        The lines are in date order, but not fixed width, so each probe
+        skips to the start of the next line and the offset returned is
+        always the start of a line, or `size`.
+    """
+    low, high = data_start, size
+    while low < high:
+        mid = (low + high) // 2
+        offset, line = _line_at(fpointer, mid, data_start)
+        mid_date = line_date(line)
+        if probes is not None:
+            probes[offset] = mid_date
+        if mid_date is None or mid_date > date or (mid_date == date and not after):
+            high = mid
+        else:
+            low = mid + 1
+    return _line_at(fpointer, low, data_start)[0]
+
+
+def _csv_window(
+    fname: str, sep: str, start_date=None, end_date=None
+) -> Optional[BytesIO]:
+    """
+    Return the header and the data lines of a CSV file within a date window.
+
+    The file is searched by byte offset for the first line on or after
+    `start_date` and the last line on or before `end_date`, so only those
+    lines are read.  This needs the lines to be in date order, as written
+    by `printiso`.  Returns None, to read the whole file, if the first
+    column can't be parsed as dates without a time zone, if any of the
+    lines looked at are out of order, or if there are fewer than two lines
+    in the window to find a frequency from.
+    """
+    bsep = sep.encode()
+    probes: Dict[int, Optional[pd.Timestamp]] = {}
+    with open(fname, "rb") as fpointer:
+        header = fpointer.readline()
+        data_start = fpointer.tell()
+        size = fpointer.seek(0, os.SEEK_END)
+        line_date = partial(_csv_line_date, sep=bsep)
+        try:
+            probes[data_start] = line_date(
+                _line_at(fpointer, data_start, data_start)[1]
+            )
+            start = data_start
+            if start_date is not None:
+                start = _bisect_lines(
+                    fpointer,
+                    data_start,
+                    size,
+                    pd.Timestamp(start_date),
+                    line_date,
+                    probes=probes,
+                )
+            stop = size
+            if end_date is not None:
+                stop = _bisect_lines(
+                    fpointer,
+                    start,
+                    size,
+                    pd.Timestamp(end_date),
+                    line_date,
+                    after=True,
+                    probes=probes,
+                )
+        except (ValueError, TypeError):
+            return None
+
+        dates = [probes[i] for i in sorted(probes) if probes[i] is not None]
+        if any(i > j for i, j in zip(dates, dates[1:])):
+            return None
+
+        fpointer.seek(start)
+        data = fpointer.read(max(stop - start, 0))
+    if len(data.split(b"\n", 2)) < 3:
+        return None
+    return BytesIO(header + data)
+
+
+def _normalize_source(
+    res: DataFrame, fname, fstr: str, dropna: Optional[str] = None
+) -> DataFrame:
+    """
+    Normalize the column names, dtypes, and index of a parsed source.
+
+    The column names are changed in place, everything else is done on the
+    returned DataFrame.
+    """
+    first = []
+    second = []
+    rest = []
+
+    for col in res.columns:
+        words = [i.strip() for i in str(col).split(":")]
+        nwords = [i.strip("0123456789") for i in words]
+
+        first.append(fstr.format(fname, words[0].strip()))
+
+        if len(words) > 1:
+            second.append([nwords[1]])
+        else:
+            second.append([])
+
+        if len(nwords) > 2:
+            rest.append(nwords[2:])
+        else:
+            rest.append([])
+    first = [[i.strip()] for i in dedup_index(first)]
+    res.columns = [":".join(i + j + k) for i, j, k in zip(first, second, rest)]
+
+    res = memory_optimize(res)
+
+    if res.index.inferred_type == "datetime64":
+        try:
+            words = res.index.name.split(":")
+        except AttributeError:
+            words = []
+
+        if len(words) > 1:
+            with suppress(TypeError):
+                res.index = res.index.tz_localize(words[1])
+            res.index.name = f"Datetime:{words[1]}"
+        else:
+            res.index.name = "Datetime"
+    else:
+        with suppress(KeyError):
+            res.set_index(0, inplace=True)
+
+    if dropna in ("any", "all"):
+        res.dropna(how=dropna, inplace=True)
+
+    return res
+
+
+def _iter_source(
+    chunks, fname, fstr: str, dropna=None, usecols=None, names=None
+) -> Iterator[DataFrame]:
+    """Yield the chunks of a source normalized the same as `read_iso_ts`."""
+    for res in chunks:
+        res = _normalize_source(res, fname, fstr, dropna)
+        if usecols:
+            res = _pick(res, usecols)
+        if names is not None:
+            res.index.name = names[0]
+            res.columns = names[1:]
+        yield res.sort_index().convert_dtypes()
+
+
+def _suffix_columns(frames: List[DataFrame]) -> List[DataFrame]:
+    """
+    Rename the columns of `frames` so that every name is unique.
+
+    A name already used by an earlier column gets a "_r" suffix, and if
+    that is also taken, "_r2", "_r3", and so on.
+    """
+    used = set()
+    renamed = []
+    for frame in frames:
+        columns = []
+        for name in frame.columns:
+            new = name
+            count = 1
+            while new in used:
+                count += 1
+                new = f"{name}_r" if count == 2 else f"{name}_r{count - 1}"
+            used.add(new)
+            columns.append(new)
+        renamed.append(frame.set_axis(columns, axis="columns"))
+    return renamed
+
+
+def _asfreq_size(frames: List[DataFrame], step) -> int:
+    """
+    Estimate the bytes of `frames` merged on a regular index of `step`.
+
+    The regular index spans the earliest to the latest date of all frames,
+    with 8 bytes for the index and each column on every row.
+    """
+    indexes = [
+        frame.index
+        for frame in frames
+        if isinstance(frame.index, pd.DatetimeIndex) and len(frame.index)
+    ]
+    if not indexes:
+        return 0
+    first = min(index.min() for index in indexes)
+    last = max(index.max() for index in indexes)
+    rows = (last - first) // step + 1
+    columns = sum(len(frame.columns) for frame in frames)
+    return int(rows) * (columns + 1) * 8
+
+
+def _merge_sources(frames: List[DataFrame]) -> DataFrame:
+    """
+    Outer join all of the `frames` on their index.
+
+    All frames are aligned on the union of their indexes in a single
+    concatenation.  Frames with duplicate index values, or with different
+    types of index, can't be aligned that way and are joined one at a time.
+    """
+    frames = _suffix_columns(frames)
+
+    # An empty frame, for example from a CSV file with only a header, has an
+    # object index that would make the concatenated index object too.  Its
+    # columns are kept with an empty index of the type of the other frames.
+    rows = [frame.index for frame in frames if len(frame.index)]
+    if rows:
+        frames = [
+            frame
+            if len(frame.index)
+            else frame.set_axis(rows[0][:0].rename(frame.index.name), axis="index")
+            for frame in frames
+        ]
+
+    if (
+        not all(frame.index.is_unique for frame in frames)
+        or len({frame.index.dtype for frame in frames}) > 1
+    ):
+        result = pd.DataFrame()
+        for frame in frames:
+            result = result.join(frame, how="outer")
+        return result
+
+    # Name the index the same as joining one frame at a time would, where
+    # the first name is kept only while the indexes are all equal or the
+    # names agree.
+    name = frames[0].index.name
+    equal = True
+    for previous, frame in zip(frames, frames[1:]):
+        equal = equal and previous.index.equals(frame.index)
+        if not equal and frame.index.name != name:
+            name = None
+
+    result = pd.concat(frames, axis="columns", join="outer", sort=True)
+    result.index.name = name
+    return result
+
+
+_EXCEL_EXTENSIONS = (".xls", ".xlsx", ".xlsm", ".xlsb", ".odf", ".ods", ".odt")
+
+_COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".zip": "zip",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+
+# The thread pool, fetched URL contents, and URL versions used by
+# `aread_iso_ts`.
+_ASYNC_READ: ContextVar = ContextVar("_ASYNC_READ", default=None)
+
+
+def _source_list(inindat) -> Tuple[Any, List]:
+    """Return the input data, unwrapped if a single sequence, and the sources."""
+    if not inindat:
+        inindat = "-"
+    if (
+        isinstance(inindat[0], (tuple, list, pd.DataFrame, pd.Series))
+        and len(inindat) == 1
+    ):
+        inindat = inindat[0]
+    return inindat, make_list(inindat, sep=" ", flat=False)
+
+
+def _source_name(source) -> Tuple[Any, List]:
+    """Return the name, or the data, of a source and its parameters."""
+    if isinstance(source, str):
+        parameters = re.split(r",(?![^\[]*\])", source)
+    else:
+        parameters = make_list(source)
+
+    if isinstance(parameters, list) and parameters:
+        fname = parameters.pop(0)
+    else:
+        fname = parameters
+        parameters = []
+    return fname, parameters
+
+
+def _source_urls(sources) -> List[str]:
+    """
+    Return the http and https URLs of the sources.
+
+    These are fetched by readers/url.py, other URLs, for example ftp:// or
+    s3://, are left for pandas to read.
+    """
+    urls = []
+    for source in sources:
+        fname = _source_name(source)[0]
+        if (
+            isinstance(fname, str)
+            and _source_kind(fname, {}) == "url"
+            and urlparse(fname).scheme in ("http", "https")
+        ):
+            urls.append(fname)
+    return urls
+
+
+def _api_source(fname, parameters, source_index, inindat) -> DataFrame:
+    """Return the DataFrame of a Python API source, or an empty DataFrame."""
+    res = pd.DataFrame()
+    if isinstance(fname, pd.DataFrame):
+        res = fname[parameters] if parameters else fname
+    elif isinstance(fname, (pd.Series, dict)):
+        res = pd.DataFrame(inindat)
+    elif isinstance(fname, (tuple, list, float)):
+        res = pd.DataFrame({f"values{source_index}": fname}, index=[0])
+    return res
+
+
+def _source_kind(fname, options: Dict) -> str:
+    """
+    Return the kind of a command line API source and update `options`.
+
+    Each kind of source sets the header, separator, or index column used
+    to read it, and they are kept for the later sources.
+    """
+    if fname in ("-", b"-"):
+        options["header"] = 0
+        return "stdin"
+    if isinstance(fname, (StringIO, BytesIO)):
+        options["header"] = 0
+        return "buffer"
+    if os.path.exists(str(fname)):
+        options.update(sep=",", index_col=0)
+        if os.path.splitext(fname)[1].lower() in _EXCEL_EXTENSIONS:
+            options["header"] = 0
+        return "local"
+    if is_valid_url(str(fname)):
+        options["header"] = "infer"
+        return "url"
+    options["header"] = 0
+    return "other"
+
+
+def _read_source(
+    fname, parameters, kind: str, options: Dict
+) -> Tuple[DataFrame, Any, Optional[Iterator[DataFrame]], bool]:
+    """
+    Read a command line API source.
+
+    Returns the DataFrame, the source name, an iterator of chunks if the
+    "chunksize" option is set, and whether the "pushcols" columns were
+    picked while reading.
+    """
+    header = options["header"]
+    sep = options["sep"]
+    index_col = options["index_col"]
+    parse_dates = options["parse_dates"]
+    skiprows = options["skiprows"]
+    na_values = options["na_values"]
+    start_date = options["start_date"]
+    end_date = options["end_date"]
+    chunksize = options["chunksize"]
+    pushcols = options["pushcols"]
+
+    res = pd.DataFrame()
+    chunks = None
+    pushed = False
+    newkwds: Dict[str, Union[str, bool]] = {}
+
+    # Store keywords for each source.
+    parameters = [str(p) for p in parameters]
+
+    args = [i for i in parameters if "=" not in i]
+
+    newkwds = dict([i.split("=") for i in parameters if "=" in i])
+    newkwds = {k: literal_eval(v) for k, v in newkwds.items()}
+
+    # Command line API
+    # Uses hspf_reader or pd.read_* functions.
+    fpi = None
+    local = False
+    binary = False
+
+    if kind == "stdin":
+        # if from stdin format must be the toolbox_utils standard
+        # pandas read_csv supports file like objects
+        fpi = sys.stdin
+    elif kind == "buffer":
+        fpi = fname
+    elif kind == "local":
+        # a local file
+        # Read all wdm, hdf5, and, xls* files here
+        local = True
+        fpi = fname
+        _, ext = os.path.splitext(fname)
+        binary = True
+
+        if ext.lower() == ".wdm":
+            nres = []
+
+            for par in args:
+                nres.extend(wdm(fname, npar) for npar in range_to_numlist(str(par)))
+            res = pd.concat(nres, axis="columns")
+        elif ext.lower() == ".hbn":
+            res = pd.DataFrame()
+            # fname: str,
+            # interval: Literal["yearly", "monthly", "daily", "bivl"],
+            # *labels,
+            interval, *labels = args
+            res = res.join(hbn(fname, interval, labels), how="outer")
+        elif ext.lower() == ".plt" and chunksize is not None:
+            chunks = plotgen_iter(
+                fname,
+                chunksize=chunksize,
+                start_date=start_date,
+                end_date=end_date,
+                columns=args or None,
+            )
+        elif ext.lower() == ".plt":
+            res = plotgen(
+                fname,
+                start_date=start_date,
+                end_date=end_date,
+                columns=args or None,
+            )
+        elif ext.lower() == ".hdf5":
+            keys = args or [None]
+            if (
+                pushcols
+                and len(keys) == 1
+                and all(isinstance(i, str) for i in pushcols)
+            ):
+                # Only "table" format stores can select columns.
+                with suppress(TypeError, KeyError, ValueError):
+                    res = pd.read_hdf(fname, key=keys[0], columns=pushcols, **newkwds)[
+                        pushcols
+                    ]
+                    pushed = True
+            if not pushed and args:
+                res = pd.DataFrame()
+
+                for i in args:
+                    res = res.join(pd.read_hdf(fname, key=i, **newkwds), how="outer")
+            elif not pushed:
+                res = pd.read_hdf(fpi, **newkwds)
+        elif ext.lower() in _EXCEL_EXTENSIONS:
+            # Sometime in the future, we may want to be able to
+            # create a multi-index, but for now, we'll just
+            # use the first row as the header.
+
+            sheet = make_list(args) if args else 0
+            positions = None
+            excelcols = None
+            if pushcols and not args:
+                positions = _reader_usecols(
+                    pd.read_excel(
+                        fname,
+                        sheet_name=sheet,
+                        header=header,
+                        nrows=0,
+                        skiprows=skiprows,
+                        **newkwds,
+                    ).columns,
+                    pushcols,
+                )
+            if positions is not None:
+                excelcols = [0, *positions]
+                pushed = True
+            try:
+                res = pd.read_excel(
+                    fname,
+                    sheet_name=sheet,
+                    keep_default_na=True,
+                    header=header,
+                    na_values=na_values,
+                    index_col=index_col,
+                    usecols=excelcols,
+                    parse_dates=parse_dates,
+                    skiprows=skiprows,
+                    **newkwds,
+                )
+            except ValueError:
+                res = pd.read_excel(
+                    fname,
+                    sheet_name=sheet,
+                    keep_default_na=True,
+                    header=header,
+                    na_values=na_values,
+                    index_col=index_col,
+                    usecols=excelcols,
+                    parse_dates=parse_dates,
+                    skiprows=skiprows,
+                    **newkwds,
+                )
+
+            if positions is not None:
+                res = _reorder(res, positions)
+
+            if isinstance(res, dict):
+                res = pd.concat(res, axis="columns")
+                # Collapse columns MultiIndex
+                flat_index = res.columns.to_flat_index()
+                flat_index = ["_".join((str(i[0]), str(i[1]))) for i in flat_index]
+                res.columns = flat_index
+        elif ext.lower() in (".parquet", ".feather", ".arrow"):
+            if pushcols and not args:
+                # Fall back to picking after reading if the columns
+                # include the index.
+                with suppress(ValueError):
+                    res = columnar(
+                        fname,
+                        columns=pushcols,
+                        start_date=start_date,
+                        end_date=end_date,
+                    )
+                    pushed = True
+            if not pushed:
+                res = columnar(
+                    fname,
+                    columns=args or None,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+        else:
+            binary = False
+
+    elif kind == "url":
+        fpi = fname
+        if fname in options["fetched"]:
+            fpi = BytesIO(options["fetched"][fname])
+            _, ext = os.path.splitext(urlparse(fname).path)
+            if ext.lower() in _COMPRESSION_EXTENSIONS:
+                newkwds.setdefault("compression", _COMPRESSION_EXTENSIONS[ext.lower()])
+    elif isinstance(fname, bytes):
+        # Python API
+
+        if b"\n" in fname or b"\r" in fname:
+            fpi = BytesIO(fname)
+        else:
+            args.insert(0, fname)
+            fname = "-"
+            fpi = sys.stdin
+    elif isinstance(fname, str):
+        # Python API
+
+        if "\n" in fname or "\r" in fname:
+            fpi = StringIO(fname)
+        else:
+            args.insert(0, fname)
+            fpi = sys.stdin
+            fname = "-"
+    else:
+        # Maybe fname and args are actual column names of standard
+        # input.
+        args.insert(0, fname)
+        fname = "-"
+        fpi = sys.stdin
+
+    if res.empty and chunks is None and not binary:
+        picks = args or pushcols
+        positions = None
+        if local and picks and "usecols" not in newkwds:
+            positions = _reader_usecols(
+                _read_csv(
+                    fpi,
+                    skipinitialspace=True,
+                    header=header,
+                    sep=sep,
+                    nrows=0,
+                    **newkwds,
+                ).columns,
+                picks,
+            )
+        if (
+            local
+            and parse_dates
+            and not newkwds
+            and header in (0, "infer")
+            and options["sorted_index"]
+            and (start_date is not None or end_date is not None)
+        ):
+            fpi = _csv_window(fpi, sep, start_date, end_date) or fpi
+        piped = None
+        if fpi is sys.stdin and options["stdin_df"].empty:
+            piped = _read_pipe(fpi)
+        if fname == "-" and not options["stdin_df"].empty:
+            res = options["stdin_df"]
+        elif piped is not None:
+            res = piped
+        else:
+            reader = _read_csv
+            workers = _csv_workers() if local else 1
+            if (
+                local
+                and chunksize is None
+                and not newkwds
+                and header in (0, "infer")
+                and isinstance(fpi, str)
+                and not fpi.lower().endswith((*_COMPRESSION_EXTENSIONS, ".tar"))
+                and os.path.getsize(fpi) >= _PARALLEL_CSV_SIZE
+                and workers > 1
+            ):
+                reader = partial(_read_csv_parallel, workers=workers)
+            res = reader(
+                fpi,
+                keep_default_na=True,
+                skipinitialspace=True,
+                header=header,
+                sep=sep,
+                na_values=na_values,
+                index_col=index_col,
+                parse_dates=parse_dates,
+                usecols=None if positions is None else [0, *positions],
+                chunksize=chunksize,
+                **newkwds,
+            )
+
+        if positions is not None:
+            pushed = not args
+        if chunksize is not None and piped is None:
+            chunks = (
+                _pick(i, args) if positions is None else _reorder(i, positions)
+                for i in res
+            )
+        else:
+            if fname == "-" and options["stdin_df"].empty:
+                options["stdin_df"] = res
+            res = _pick(res, args) if positions is None else _reorder(res, positions)
+
+    return res, fname, chunks, pushed
+
+
+_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def read_cache_info() -> Dict[str, int]:
+    """Return the hit and miss counts of the `read_iso_ts` cache."""
+    return dict(_CACHE_STATS)
+
+
+def read_cache_clear(cache_dir: Optional[Union[str, os.PathLike]] = None):
+    """Remove the cached files and reset the hit and miss counts."""
+    cache_dir = cache_dir or os.environ.get("TOOLBOX_UTILS_CACHE_DIR")
+    if cache_dir is not None:
+        for path in _cache_files(cache_dir):
+            with suppress(OSError):
+                path.unlink()
+    _CACHE_STATS.update(hits=0, misses=0)
+
+
+def _cache_files(cache_dir: Union[str, os.PathLike]) -> List[Path]:
+    """Return the cached files in `cache_dir`."""
+    return [
+        i
+        for i in Path(cache_dir).glob("*")
+        if i.suffix in (".parquet", ".pkl", ".http", ".json")
+    ]
+
+
+def _cache_key(
+    sources, kwds: Dict, versions: Optional[Dict[str, str]] = None
+) -> Optional[str]:
+    """
+    Return the cache key of a `read_iso_ts` call, or None if not cacheable.
+
+    Only calls where every source is a local file, or a URL with a version
+    in `versions`, are cached.  The key is a hash of the path, size, and
+    modification time of each file, the version of each URL, and all of
+    the reader keywords.
+    """
+    versions = versions or {}
+    files = []
+    for source in sources:
+        if not isinstance(source, str):
+            return None
+        fname = re.split(r",(?![^\[]*\])", source)[0]
+        if versions.get(fname) is not None:
+            files.append((fname, versions[fname]))
+            continue
+        if not os.path.isfile(fname):
+            return None
+        stat = os.stat(fname)
+        files.append((os.path.abspath(fname), stat.st_size, stat.st_mtime_ns))
+    token = repr((sources, files, sorted(kwds.items())))
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _cache_load(cache_dir: Union[str, os.PathLike], key: str) -> Optional[DataFrame]:
+    """Return the cached DataFrame for `key`, or None."""
+    for path in (Path(cache_dir) / f"{key}.parquet", Path(cache_dir) / f"{key}.pkl"):
+        if not path.exists():
+            continue
+        try:
+            if path.suffix == ".pkl":
+                tsd = pd.read_pickle(path)
+            else:
+                import pyarrow.parquet as pq
+
+                table = pq.read_table(path)
+                tsd = table.to_pandas()
+                metadata = table.schema.metadata or {}
+                if isinstance(tsd.index, pd.DatetimeIndex):
+                    # Arrow keeps only the offset or name of a time zone, so
+                    # put back the time zone object that was stored.
+                    tz = metadata.get(b"toolbox_utils_tz")
+                    if tz and tsd.index.tz is not None:
+                        tsd.index = tsd.index.tz_convert(
+                            pickle.loads(base64.b64decode(tz))
+                        )
+                    freq = metadata.get(b"toolbox_utils_freq")
+                    if freq:
+                        tsd.index.freq = to_offset(freq.decode())
+        except (
+            AttributeError,
+            EOFError,
+            ImportError,
+            OSError,
+            TypeError,
+            ValueError,
+            pickle.UnpicklingError,
+        ):
+            continue
+        # The modification time orders the files for eviction.
+        with suppress(OSError):
+            os.utime(path)
+        return tsd
+    return None
+
+
+def _cache_store(
+    cache_dir: Union[str, os.PathLike], key: str, tsd: DataFrame, cache_size: int
+):
+    """Store `tsd` as Parquet, or a pickle without pyarrow, then evict."""
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        suffix = ".parquet"
+    except ImportError:
+        suffix = ".pkl"
+
+    fd, tmpname = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        if suffix == ".pkl":
+            tsd.to_pickle(tmpname)
+        else:
+            table = pa.Table.from_pandas(tsd)
+            metadata = dict(table.schema.metadata or {})
+            freq = getattr(tsd.index, "freqstr", None)
+            if freq:
+                metadata[b"toolbox_utils_freq"] = freq.encode()
+            tz = getattr(tsd.index, "tz", None)
+            if tz is not None:
+                metadata[b"toolbox_utils_tz"] = base64.b64encode(pickle.dumps(tz))
+            pq.write_table(table.replace_schema_metadata(metadata), tmpname)
+        os.replace(tmpname, Path(cache_dir) / f"{key}{suffix}")
+    except (
+        AttributeError,
+        NotImplementedError,
+        OSError,
+        TypeError,
+        ValueError,
+        pickle.PicklingError,
+    ):
+        # Some DataFrames, for example with mixed type columns, can't be
+        # written as Parquet.
+        with suppress(OSError):
+            os.remove(tmpname)
+        return
+
+    _cache_evict(cache_dir, cache_size)
+
+
+def _cache_evict(cache_dir: Union[str, os.PathLike], cache_size: int):
+    """Remove the least recently used files until under `cache_size` bytes."""
+    files = []
+    for path in _cache_files(cache_dir):
+        with suppress(OSError):
+            stat = path.stat()
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(i[1] for i in files)
+    for _, size, path in sorted(files):
+        if total <= cache_size:
+            break
+        with suppress(OSError):
+            path.unlink()
+        total -= size
+
+
 @validate_call
 def read_iso_ts(
     *inindat,
@@ -2187,8 +3427,17 @@ def read_iso_ts(
     sep: Optional[str] = ",",
     index_col=0,
     usecols=None,
+    start_date=None,
+    end_date=None,
+    sorted_index: bool = False,
+    chunksize: Optional[int] = None,
+    cache_dir: Optional[Union[str, os.PathLike]] = None,
+    cache_size: Optional[int] = None,
+    cache_ttl: Optional[float] = None,
+    align: Literal["asfreq", "union"] = "asfreq",
+    max_memory: Optional[int] = None,
     **kwds,
-) -> pd.DataFrame:
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
     Read the format printed by 'printiso' and maybe other formats.
 
@@ -2235,23 +3484,62 @@ def read_iso_ts(
         given as string name or column index.  If a sequence of int /
         str is given, a MultiIndex is used.
     usecols
-        Return a subset of the columns.  If list-like, all elements
-        must either be positional (i.e. integer indices into the
-        document columns) or strings that correspond to column names
-        provided either by the user in names or inferred from the
-        document header row(s).  For example, a valid list-like
-        usecols parameter would be [0, 1, 2] or ['foo', 'bar',
-        'baz'].  Element order is ignored, so usecols=[0, 1] is the
-        same as [1, 0].  To instantiate a DataFrame from data with
-        element order preserved use pd.read_csv(data,
-        usecols=['foo', 'bar'])[['foo', 'bar']] for columns in ['foo',
-        'bar'] order or pd.read_csv(data, usecols=['foo', 'bar'])[['bar',
-        'foo']] for ['bar', 'foo'] order.  If callable, the callable
-        function will be evaluated against the column names, returning
-        names where the callable function evaluates to True.  An
-        example of a valid callable argument would be lambda x:
-        x.upper() in ['AAA', 'BBB', 'DDD'].  Using this parameter
-        results in much faster parsing time and lower memory usage.
+        Columns to pick, as column names or numbers where the first data
+        column is 1, the same as the "pick" keyword of `common_kwds`.  For
+        a single CSV, Excel, or HDF5 source only these columns are parsed,
+        otherwise they are picked after the sources are merged.
+    start_date
+        If given, sources that can seek to a date, currently HSPF PLTGEN
+        files, Parquet, Feather, and Arrow IPC files, and local CSV files if
+        `sorted_index` is True, only read data on or after this date.  Other
+        sources are returned whole by `read_iso_ts` and are only sliced
+        afterwards by `common_kwds`, so use `common_kwds` to get the same
+        window from every kind of source.
+    end_date
+        If given, sources that can seek to a date only read data on or
+        before this date.  Both dates are inclusive, the same as the slice
+        made by `common_kwds`.
+    sorted_index
+        If True, local CSV files are promised to be sorted by date, so a
+        `start_date` or `end_date` window is found by a binary search of
+        the file instead of parsing all of it.  Only a few lines are
+        checked, so an unsorted file can silently lose rows.  Defaults to
+        False, and `common_kwds` doesn't set it.
+    chunksize
+        If given, return an iterator of DataFrames of at most this many
+        rows instead of a single DataFrame.  Only one source can be read
+        in chunks.  CSV and HSPF PLTGEN sources are parsed one chunk at a
+        time, other sources are read whole and then split.  Each chunk has
+        the same column names, index, and dtypes handling as a DataFrame
+        returned without `chunksize`.
+    cache_dir
+        If given, or if the TOOLBOX_UTILS_CACHE_DIR environment variable
+        is set, the DataFrame read from local files and URLs is cached in
+        this directory.  A later call with the same files and URLs,
+        unchanged, and the same keywords loads the cached DataFrame
+        instead of parsing the sources.  The hit and miss counts are
+        returned by `read_cache_info`.  URL responses are also kept with
+        their ETag and Last-Modified headers, and are revalidated with a
+        conditional request, so an unchanged URL isn't downloaded again.
+    cache_size
+        The most bytes kept in the cache directory, removing the least
+        recently used files first.  Defaults to the
+        TOOLBOX_UTILS_CACHE_SIZE environment variable, or 1 GiB.
+    cache_ttl
+        The seconds that a cached URL response is used without asking the
+        server if it changed.  Defaults to the TOOLBOX_UTILS_CACHE_TTL
+        environment variable, or 0 to revalidate on every call.
+    align
+        How sources with different frequencies are merged.  If "asfreq",
+        every source is changed to the finest frequency of all sources,
+        filling new rows with missing values.  If "union", each source
+        keeps its own rows and the index is the union of the source
+        indexes.
+    max_memory
+        If `align` is "asfreq", the most bytes the merged DataFrame is
+        estimated to need, otherwise a ValueError is raised before any
+        source is changed to the finest frequency.  Defaults to the
+        TOOLBOX_UTILS_MAX_MEMORY environment variable, or 1 GiB.
     **kwds
         Any additional keyword arguments are passed to
         pandas.read_csv().
@@ -2259,7 +3547,14 @@ def read_iso_ts(
     Returns
     -------
     df: DataFrame
-        Returns a DataFrame.
+        Returns a DataFrame, or an iterator of DataFrames if `chunksize` is
+        given.
+
+    Notes
+    -----
+    Local CSV files of 64 MiB or more are parsed in a pool of processes,
+    one for each processor.  Set the TOOLBOX_UTILS_CSV_WORKERS environment
+    variable to the number of processes, or 1 to turn this off.
     """
     # inindat
     #
@@ -2291,9 +3586,6 @@ def read_iso_ts(
     clean = kwds.get("clean", False)
     names = kwds.get("names")
 
-    if not inindat:
-        inindat = "-"
-
     # Would want this to be more generic...
     na_values = []
     for spc in range(20)[1:]:
@@ -2308,251 +3600,130 @@ def read_iso_ts(
     if index_type == "number":
         parse_dates = False
 
-    if (
-        isinstance(inindat[0], (tuple, list, pd.DataFrame, pd.Series))
-        and len(inindat) == 1
-    ):
-        inindat = inindat[0]
-    sources = make_list(inindat, sep=" ", flat=False)
+    inindat, sources = _source_list(inindat)
 
-    lresult_list = []
-    zones = set()
-    result = pd.DataFrame()
-    stdin_df = pd.DataFrame()
-    for source_index, source in enumerate(sources):
-        res = pd.DataFrame()
-        if isinstance(source, str):
-            parameters = re.split(r",(?![^\[]*\])", source)
-        else:
-            parameters = make_list(source)
-
-        if isinstance(parameters, list) and parameters:
-            fname = parameters.pop(0)
-        else:
-            fname = parameters
-            parameters = []
+    if chunksize is not None and len(sources) != 1:
+        raise ValueError(
+            error_wrapper(
+                f"""
+                The "chunksize" keyword can only be used to read a single
+                source, not the {len(sources)} sources given.
+                """
+            )
+        )
 
-        # Python API
-        if isinstance(fname, pd.DataFrame):
-            res = fname[parameters] if parameters else fname
-        elif isinstance(fname, (pd.Series, dict)):
-            res = pd.DataFrame(inindat)
-        elif isinstance(fname, (tuple, list, float)):
-            res = pd.DataFrame({f"values{source_index}": fname}, index=[0])
-
-        newkwds: Dict[str, Union[str, bool]] = {}
-        if res.empty:
-            # Store keywords for each source.
-            parameters = [str(p) for p in parameters]
-
-            args = [i for i in parameters if "=" not in i]
-
-            newkwds = dict([i.split("=") for i in parameters if "=" in i])
-            newkwds = {k: literal_eval(v) for k, v in newkwds.items()}
-
-            # Command line API
-            # Uses hspf_reader or pd.read_* functions.
-            fpi = None
-
-            if fname in ("-", b"-"):
-                # if from stdin format must be the toolbox_utils standard
-                # pandas read_csv supports file like objects
-
-                if "header" not in kwds:
-                    kwds["header"] = 0
-                header = 0
-                fpi = sys.stdin
-            elif isinstance(fname, (StringIO, BytesIO)):
-                fpi = fname
-                header = 0
-            elif os.path.exists(str(fname)):
-                # a local file
-                # Read all wdm, hdf5, and, xls* files here
-                sep = ","
-                index_col = 0
-                usecols = None
-                fpi = fname
-                _, ext = os.path.splitext(fname)
-
-                if ext.lower() == ".wdm":
-                    nres = []
-
-                    for par in args:
-                        nres.extend(
-                            wdm(fname, npar) for npar in range_to_numlist(str(par))
-                        )
-                    res = pd.concat(nres, axis="columns")
-                elif ext.lower() == ".hbn":
-                    res = pd.DataFrame()
-                    # fname: str,
-                    # interval: Literal["yearly", "monthly", "daily", "bivl"],
-                    # *labels,
-                    interval, *labels = args
-                    res = res.join(hbn(fname, interval, labels), how="outer")
-                elif ext.lower() == ".plt":
-                    res = plotgen(fname)
-                elif ext.lower() == ".hdf5":
-                    if args:
-                        res = pd.DataFrame()
-
-                        for i in args:
-                            res = res.join(
-                                pd.read_hdf(fname, key=i, **newkwds), how="outer"
-                            )
-                    else:
-                        res = pd.read_hdf(fpi, **newkwds)
-                elif ext.lower() in (
-                    ".xls",
-                    ".xlsx",
-                    ".xlsm",
-                    ".xlsb",
-                    ".odf",
-                    ".ods",
-                    ".odt",
-                ):
-                    # Sometime in the future, we may want to be able to
-                    # create a multi-index, but for now, we'll just
-                    # use the first row as the header.
-                    header = 0
-
-                    sheet = make_list(args) if args else 0
-                    try:
-                        res = pd.read_excel(
-                            fname,
-                            sheet_name=sheet,
-                            keep_default_na=True,
-                            header=header,
-                            na_values=na_values,
-                            index_col=index_col,
-                            usecols=usecols,
-                            parse_dates=parse_dates,
-                            skiprows=skiprows,
-                            **newkwds,
-                        )
-                    except ValueError:
-                        res = pd.read_excel(
-                            fname,
-                            sheet_name=sheet,
-                            keep_default_na=True,
-                            header=header,
-                            na_values=na_values,
-                            index_col=index_col,
-                            usecols=usecols,
-                            parse_dates=parse_dates,
-                            skiprows=skiprows,
-                            **newkwds,
-                        )
+    cache_dir = cache_dir or os.environ.get("TOOLBOX_UTILS_CACHE_DIR")
+    if cache_size is None:
+        cache_size = int(os.environ.get("TOOLBOX_UTILS_CACHE_SIZE", str(2**30)))
+
+    pool, fetched, versions = _ASYNC_READ.get() or (None, {}, {})
+    if cache_dir is not None:
+        urls = [i for i in _source_urls(sources) if i not in fetched]
+        if urls:
+            if cache_ttl is None:
+                cache_ttl = float(os.environ.get("TOOLBOX_UTILS_CACHE_TTL", "0"))
+            fetched = dict(fetched)
+            versions = dict(versions)
+            http_pool = {}
+            try:
+                for url in urls:
+                    fetched[url], versions[url] = url_cache_get(
+                        url, cache_dir, cache_ttl, http_pool
+                    )
+            finally:
+                close_pool(http_pool)
+            _cache_evict(cache_dir, cache_size)
+
+    cache_key = None
+    if cache_dir is not None and chunksize is None:
+        cache_key = _cache_key(
+            sources,
+            {
+                "dropna": dropna,
+                "extended_columns": extended_columns,
+                "parse_dates": parse_dates,
+                "skiprows": skiprows,
+                "index_type": index_type,
+                "names": names,
+                "header": header,
+                "sep": sep,
+                "index_col": index_col,
+                "usecols": usecols,
+                "start_date": start_date,
+                "end_date": end_date,
+                "sorted_index": sorted_index,
+                "align": align,
+                **kwds,
+            },
+            versions,
+        )
+    if cache_key is not None:
+        cached = _cache_load(cache_dir, cache_key)
+        if cached is not None:
+            _CACHE_STATS["hits"] += 1
+            return cached
+        _CACHE_STATS["misses"] += 1
+
+    usecols = make_list(usecols)
+
+    options = {
+        "header": header,
+        "sep": sep,
+        "index_col": index_col,
+        "parse_dates": parse_dates,
+        "skiprows": skiprows,
+        "na_values": na_values,
+        "start_date": start_date,
+        "end_date": end_date,
+        "sorted_index": sorted_index,
+        "chunksize": chunksize,
+        # Only a single source can pick columns while reading, since column
+        # numbers refer to the merged result.
+        "pushcols": usecols if len(sources) == 1 else None,
+        "stdin_df": pd.DataFrame(),
+        "fetched": fetched,
+    }
 
-                    if isinstance(res, dict):
-                        res = pd.concat(res, axis="columns")
-                        # Collapse columns MultiIndex
-                        flat_index = res.columns.to_flat_index()
-                        flat_index = [
-                            "_".join((str(i[0]), str(i[1]))) for i in flat_index
-                        ]
-                        res.columns = flat_index
-
-            elif is_valid_url(str(fname)):
-                # a url?
-                header = "infer"
-                fpi = fname
-            elif isinstance(fname, bytes):
-                # Python API
-
-                if b"\n" in fname or b"\r" in fname:
-                    fpi = BytesIO(fname)
-                else:
-                    args.insert(0, fname)
-                    fname = "-"
-                    fpi = sys.stdin
-                # a string?
-                header = 0
-            elif isinstance(fname, str):
-                # Python API
-
-                if "\n" in fname or "\r" in fname:
-                    fpi = StringIO(fname)
-                else:
-                    args.insert(0, fname)
-                    fpi = sys.stdin
-                    fname = "-"
-                # a string?
-                header = 0
-            else:
-                # Maybe fname and args are actual column names of standard
-                # input.
-                args.insert(0, fname)
-                fname = "-"
-                header = 0
-                fpi = sys.stdin
-
-        if res.empty:
-            if fname == "-" and not stdin_df.empty:
-                res = stdin_df
-            else:
-                res = pd.read_csv(
-                    fpi,
-                    engine="python",
-                    keep_default_na=True,
-                    skipinitialspace=True,
-                    header=header,
-                    sep=sep,
-                    na_values=na_values,
-                    index_col=index_col,
-                    parse_dates=parse_dates,
-                    **newkwds,
-                )
+    reads = []
+    for source_index, source in enumerate(sources):
+        fname, parameters = _source_name(source)
+        res = _api_source(fname, parameters, source_index, inindat)
+        if not res.empty:
+            reads.append((res, fname, None, False))
+            continue
 
-            if fname == "-" and stdin_df.empty:
-                stdin_df = res
-            res = _pick(res, args)
+        kind = _source_kind(fname, options)
+        if pool is not None and (
+            kind == "local" or (kind == "url" and fname in fetched)
+        ):
+            reads.append(
+                pool.submit(_read_source, fname, parameters, kind, dict(options))
+            )
+        else:
+            reads.append(_read_source(fname, parameters, kind, options))
 
+    lresult_list = []
+    zones = set()
+    pushed = False
+    for read in reads:
+        if isinstance(read, Future):
+            read = read.result()
+        res, fname, chunks, source_pushed = read
+        pushed = pushed or source_pushed
         lresult_list.append(res)
         with suppress(AttributeError):
             zones.add(res.index.tzinfo)
 
-    first = []
-    second = []
-    rest = []
-
-    for col in res.columns:
-        words = [i.strip() for i in str(col).split(":")]
-        nwords = [i.strip("0123456789") for i in words]
-
-        first.append(fstr.format(fname, words[0].strip()))
-
-        if len(words) > 1:
-            second.append([nwords[1]])
-        else:
-            second.append([])
-
-        if len(nwords) > 2:
-            rest.append(nwords[2:])
-        else:
-            rest.append([])
-    first = [[i.strip()] for i in dedup_index(first)]
-    res.columns = [":".join(i + j + k) for i, j, k in zip(first, second, rest)]
-
-    res = memory_optimize(res)
-
-    if res.index.inferred_type == "datetime64":
-        try:
-            words = res.index.name.split(":")
-        except AttributeError:
-            words = []
+    if chunksize is not None:
+        if chunks is None:
+            chunks = (
+                res.iloc[i : i + chunksize] for i in range(0, len(res), chunksize)
+            )
+        return _iter_source(
+            chunks, fname, fstr, dropna, None if pushed else usecols, names
+        )
 
-        if len(words) > 1:
-            with suppress(TypeError):
-                res.index = res.index.tz_localize(words[1])
-            res.index.name = f"Datetime:{words[1]}"
-        else:
-            res.index.name = "Datetime"
-    else:
-        with suppress(KeyError):
-            res.set_index(0, inplace=True)
-
-    if dropna in ("any", "all"):
-        res.dropna(how=dropna, inplace=True)
+    res = _normalize_source(res, fname, fstr, dropna)
 
     if len(lresult_list) > 1:
         epoch = pd.to_datetime("2000-01-01")
@@ -2581,18 +3752,33 @@ def read_iso_ts(
                 moffset = epoch + to_offset(res.index.inferred_freq)
                 offset_set.add(moffset)
 
-        result = pd.DataFrame()
-
-        for lres in lresult_list:
-            if len(offset_set) < 2:
-                result = result.join(lres, how="outer", rsuffix="_r")
-            else:
-                result = result.join(
-                    lres.asfreq(moffset - epoch), how="outer", rsuffix="_r"
+        if len(offset_set) > 1 and align == "asfreq":
+            step = moffset - epoch
+            if max_memory is None:
+                max_memory = int(os.environ.get("TOOLBOX_UTILS_MAX_MEMORY", str(2**30)))
+            size = _asfreq_size(lresult_list, step)
+            if size > max_memory:
+                raise ValueError(
+                    error_wrapper(
+                        f"""
+                        Merging the sources at the finest frequency of
+                        {step} would need about {size / 2**20:.0f} MiB, more
+                        than the limit of {max_memory / 2**20:.0f} MiB.  Use
+                        align="union" to keep the rows of each source, or
+                        increase "max_memory" or the TOOLBOX_UTILS_MAX_MEMORY
+                        environment variable.
+                        """
+                    )
                 )
+            lresult_list = [lres.asfreq(step) for lres in lresult_list]
+
+        result = _merge_sources(lresult_list)
     else:
         result = lresult_list[0]
 
+    if usecols and not pushed:
+        result = _pick(result, usecols)
+
     # Assign names to the index and columns.
 
     if names is not None:
@@ -2600,8 +3786,75 @@ def read_iso_ts(
         result.columns = names
 
     result.sort_index(inplace=True)
+    result = result.convert_dtypes()
+
+    if cache_key is not None:
+        _cache_store(cache_dir, cache_key, result, cache_size)
 
-    return result.convert_dtypes()
+    return result
+
+
+async def aread_iso_ts(
+    *inindat,
+    max_connections: int = 8,
+    max_workers: Optional[int] = None,
+    **kwds,
+) -> pd.DataFrame:
+    """
+    Read the same sources as `read_iso_ts` concurrently.
+
+    The URL sources are fetched at the same time, reusing the connections
+    to each host, then the URL and local file sources are parsed in a
+    thread pool.  The DataFrames are merged by `read_iso_ts`, so the result
+    is the same as calling it with the same arguments.
+
+    Parameters
+    ----------
+    *inindat
+        The input data, the same as `read_iso_ts`.
+    max_connections
+        The most URL requests made at the same time.
+    max_workers
+        The most threads parsing sources at the same time.  Defaults to the
+        `concurrent.futures.ThreadPoolExecutor` default.
+    **kwds
+        Any other keywords of `read_iso_ts`, except for "chunksize".
+
+    Returns
+    -------
+    df: DataFrame
+        Returns a DataFrame.
+    """
+    if kwds.get("chunksize") is not None:
+        raise ValueError(
+            error_wrapper(
+                """
+                The "chunksize" keyword can't be used with "aread_iso_ts",
+                use "read_iso_ts" instead.
+                """
+            )
+        )
+
+    cache_dir = kwds.get("cache_dir") or os.environ.get("TOOLBOX_UTILS_CACHE_DIR")
+    cache_ttl = kwds.get("cache_ttl")
+    if cache_ttl is None:
+        cache_ttl = float(os.environ.get("TOOLBOX_UTILS_CACHE_TTL", "0"))
+    urls = _source_urls(_source_list(inindat)[1])
+    responses = {}
+    if urls:
+        responses = await url_get_all(
+            urls, max_connections=max_connections, cache_dir=cache_dir, ttl=cache_ttl
+        )
+    fetched = {url: body for url, (body, _) in responses.items()}
+    versions = {url: version for url, (_, version) in responses.items()}
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        context = copy_context()
+        context.run(_ASYNC_READ.set, (pool, fetched, versions))
+        return await loop.run_in_executor(
+            None, context.run, partial(read_iso_ts, *inindat, **kwds)
+        )
 
 
 @validate_call
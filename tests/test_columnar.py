@@ -0,0 +1,79 @@
+"""
+columnar
+----------------------------------
+
+Tests for the Parquet, Feather, and Arrow IPC reader.
+"""
+
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from toolbox_utils import tsutils
+from toolbox_utils.readers.columnar import columnar_columns, columnar_extract
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+feather = pytest.importorskip("pyarrow.feather")
+
+
+@pytest.fixture(name="files")
+def fixture_files(tmp_path):
+    tsd = pd.read_csv("tests/data_start.bivl.csv", index_col=0, parse_dates=True)
+    tsd["double"] = tsd["RCHRES_14_ROVOL"] * 2
+    files = {
+        "parquet": tmp_path / "data.parquet",
+        "feather": tmp_path / "data.feather",
+        "arrow": tmp_path / "data.arrow",
+    }
+    pq.write_table(pa.Table.from_pandas(tsd), files["parquet"], row_group_size=1000)
+    feather.write_feather(pa.Table.from_pandas(tsd), files["feather"])
+    feather.write_feather(
+        pa.Table.from_pandas(tsd.reset_index(), preserve_index=False), files["arrow"]
+    )
+    return {key: str(value) for key, value in files.items()}
+
+
+def test_columns(files):
+    for fname in files.values():
+        assert columnar_columns(fname) == ["RCHRES_14_ROVOL", "double"]
+
+
+def test_extract(files):
+    comp = pd.read_csv("tests/data_start.bivl.csv", index_col=0, parse_dates=True)
+    comp = comp.loc["2007-03-01":"2007-03-02 05:00"]
+    for fname in files.values():
+        out = columnar_extract(
+            fname, columns=[1], start_date="2007-03-01", end_date="2007-03-02 05:00"
+        )
+        assert_frame_equal(out, comp)
+        assert list(columnar_extract(fname, columns=["double", 1]).columns) == [
+            "double",
+            "RCHRES_14_ROVOL",
+        ]
+    with pytest.raises(ValueError):
+        columnar_extract(files["parquet"], columns=[3])
+
+
+def test_import_first():
+    subprocess.run(
+        [sys.executable, "-c", "import toolbox_utils.readers.columnar"], check=True
+    )
+
+
+def test_read_iso_ts(files):
+    comp = tsutils.common_kwds(
+        "tests/data_start.bivl.csv", start_date="2007-03-01", end_date="2007-03-02"
+    )
+    for fname in files.values():
+        out = tsutils.common_kwds(
+            f"{fname},RCHRES_14_ROVOL", start_date="2007-03-01", end_date="2007-03-02"
+        )
+        assert_frame_equal(out, comp, check_dtype=False)
+        out = tsutils.common_kwds(
+            fname, pick=[1], start_date="2007-03-01", end_date="2007-03-02"
+        )
+        assert_frame_equal(out, comp, check_dtype=False)
@@ -5,13 +5,20 @@ hbn
 Tests for `hspf_reader hbn` module.
 """
 
+import subprocess
+import sys
 from io import BytesIO
+from textwrap import dedent
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
+import pytest
 from pandas.testing import assert_frame_equal
 
 import toolbox_utils
+import toolbox_utils.readers.hbn
+import toolbox_utils.tsutils
 
 
 class TestDescribe(TestCase):
@@ -85,3 +92,208 @@ class TestDescribe(TestCase):
             "tests/data_yearly.hbn", "yearly", ["", 905, "", "AGWS"]
         )
         assert_frame_equal(out, self.extract, check_dtype=False)
+
+    def test_extract_all_labels_float64(self):
+        out = toolbox_utils.readers.hbn.hbn_extract(
+            "tests/data_yearly.hbn", "yearly", ",,,"
+        )
+        assert (out.dtypes == "float64").all()
+        assert_frame_equal(out[["PERLND_905_AGWS"]], self.extract, check_dtype=False)
+
+    def test_extract_multi(self):
+        out = toolbox_utils.readers.hbn.hbn_extract_multi(
+            "tests/data_yearly.hbn", ["yearly", "daily"], ",905,,AGWS"
+        )
+        assert_frame_equal(out["yearly"], self.extract, check_dtype=False)
+        assert out["daily"].empty
+
+    def test_extract_workers(self):
+        out = toolbox_utils.readers.hbn.hbn_extract(
+            "tests/data_yearly.hbn", "yearly", ",,,", workers=2
+        )
+        assert_frame_equal(
+            out,
+            toolbox_utils.readers.hbn.hbn_extract(
+                "tests/data_yearly.hbn", "yearly", ",,,"
+            ),
+        )
+
+
+def test_tail(tmp_path):
+    """Test reading a HBN file as it is written."""
+    with open("tests/data_yearly.hbn", "rb") as fpi:
+        data = fpi.read()
+    hbnfile = tmp_path / "data.hbn"
+    hbnfile.write_bytes(b"")
+
+    tail = toolbox_utils.readers.hbn.HbnTail(str(hbnfile), "yearly")
+    assert tail.refresh() == 0
+    for stop in range(0, len(data), 100001):
+        with open(hbnfile, "ab") as fpo:
+            fpo.write(data[stop : stop + 100001])
+        tail.refresh()
+
+    assert_frame_equal(
+        tail.frame(),
+        toolbox_utils.readers.hbn.hbn_extract("tests/data_yearly.hbn", "yearly", ",,,"),
+    )
+
+
+@pytest.mark.parametrize("fmt", ["npz", "parquet"])
+def test_to_columnar(tmp_path, fmt):
+    """Test conversion of a HBN file to parquet and npz."""
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    outfile = tmp_path / f"data.{fmt}"
+    assert (
+        toolbox_utils.readers.hbn.hbn_to_columnar(
+            "tests/data_yearly.hbn", outfile, "yearly", chunksize=7, fmt=fmt
+        )
+        == fmt
+    )
+    comp = toolbox_utils.readers.hbn.hbn_extract(
+        "tests/data_yearly.hbn", "yearly", ",,,"
+    )
+
+    if fmt == "parquet":
+        out = pd.read_parquet(outfile)
+        assert list(out.columns[1:]) == list(comp.columns)
+        values = out.iloc[:, 1:].values
+    else:
+        out = np.load(outfile)
+        assert list(out["columns"]) == list(comp.columns)
+        assert out["group"][0] == "PWATER"
+        values = out["values"]
+    np.testing.assert_array_equal(values, comp.values)
+
+
+def test_diff(tmp_path):
+    """Test comparing a HBN file with itself."""
+    outfile = tmp_path / "diff.npz"
+    out = toolbox_utils.readers.hbn.hbn_diff(
+        "tests/data_yearly.hbn",
+        "tests/data_yearly.hbn",
+        "yearly",
+        ",905,,",
+        chunksize=7,
+        outfilename=outfile,
+        fmt="npz",
+    )
+    assert list(out.columns) == ["sum_diff", "max_abs_diff", "rmse", "percent_change"]
+    assert (out["sum_diff"] == 0).all()
+    assert (out["rmse"] == 0).all()
+    assert out.loc["PERLND_905_AGWS", "percent_change"] == 0
+    assert not np.load(outfile)["values"].any()
+
+
+def test_diff_missing(tmp_path):
+    """Test that a missing value doesn't hide the other differences."""
+    hbn = toolbox_utils.readers.hbn
+    _, index = hbn._new_index("yearly", [",905,,AGWS"])
+    with hbn._open_hbn("tests/data_yearly.hbn") as buf:
+        hbn._scan(buf, index)
+        _, offsets, blocknums, _ = hbn._sorted_records(index, 5)
+        content = bytearray(buf)
+    position = 4 * index.blocks[blocknums[0]][1][0]
+    missing, changed = offsets[0] + position, offsets[1] + position
+    content[missing : missing + 4] = np.float32(np.nan).tobytes()
+    value = np.frombuffer(content, dtype=np.float32, count=1, offset=changed)[0]
+    content[changed : changed + 4] = np.float32(value + 2).tobytes()
+    other = tmp_path / "other.hbn"
+    other.write_bytes(content)
+
+    out = hbn.hbn_diff(
+        "tests/data_yearly.hbn", other, "yearly", ",905,,AGWS", chunksize=7
+    )
+    assert out.loc["PERLND_905_AGWS", "max_abs_diff"] == pytest.approx(2)
+    assert out.loc["PERLND_905_AGWS", "sum_diff"] == pytest.approx(2)
+
+
+def test_extract_files(tmp_path):
+    """Test extraction from several HBN files."""
+    other = tmp_path / "other.hbn"
+    with open("tests/data_yearly.hbn", "rb") as fpi:
+        other.write_bytes(fpi.read())
+
+    out = toolbox_utils.readers.hbn.hbn_extract_files(
+        ["tests/data_yearly.hbn", other], "yearly", ",905,,AGWS", workers=2
+    )
+    assert list(out.columns) == [
+        "data_yearly.PERLND_905_AGWS",
+        "other.PERLND_905_AGWS",
+    ]
+    assert (out.iloc[:, 0] == out.iloc[:, 1]).all()
+
+
+def test_export(tmp_path):
+    """Test export of each operation to a separate file."""
+    out = toolbox_utils.readers.hbn.hbn_export(
+        "tests/data_yearly.hbn", tmp_path, "yearly", memory_budget=10000, fmt="npz"
+    )
+    assert list(out) == ["PERLND", "IMPLND"]
+    comp = toolbox_utils.readers.hbn.hbn_extract(
+        "tests/data_yearly.hbn", "yearly", ",,,"
+    )
+    for outfile in out.values():
+        npz = np.load(outfile)
+        np.testing.assert_array_equal(npz["values"], comp[npz["columns"]].values)
+
+
+def test_aggregate():
+    """Test aggregation of the yearly values."""
+    out = toolbox_utils.readers.hbn.hbn_aggregate(
+        "tests/data_yearly.hbn", "yearly", ",905,,AGWS", freq="A", chunksize=7
+    )
+    assert list(out.columns) == [
+        "PERLND_905_AGWS::sum",
+        "PERLND_905_AGWS::mean",
+        "PERLND_905_AGWS::min",
+        "PERLND_905_AGWS::max",
+    ]
+    comp = toolbox_utils.readers.hbn.hbn_extract(
+        "tests/data_yearly.hbn", "yearly", ",905,,AGWS"
+    )
+    for column in out.columns:
+        np.testing.assert_allclose(out[column].values, comp.iloc[:, 0].values)
+
+
+def test_import_first():
+    subprocess.run(
+        [sys.executable, "-c", "import toolbox_utils.readers.hbn"], check=True
+    )
+
+
+def _run_spawned(code):
+    """Run `code` in a fresh interpreter that starts processes by spawning."""
+    script = "import multiprocessing\nmultiprocessing.set_start_method('spawn')\n"
+    subprocess.run([sys.executable, "-c", script + dedent(code)], check=True)
+
+
+def test_extract_workers_spawn():
+    _run_spawned(
+        """
+        from toolbox_utils.readers.hbn import hbn_extract
+
+        out = hbn_extract("tests/data_yearly.hbn", "yearly", ",,,", workers=2)
+        assert out.equals(hbn_extract("tests/data_yearly.hbn", "yearly", ",,,"))
+        """
+    )
+
+
+def test_extract_files_spawn(tmp_path):
+    other = tmp_path / "other.hbn"
+    with open("tests/data_yearly.hbn", "rb") as fpi:
+        other.write_bytes(fpi.read())
+    _run_spawned(
+        f"""
+        from toolbox_utils.readers.hbn import hbn_extract_files
+
+        out = hbn_extract_files(
+            ["tests/data_yearly.hbn", {str(other)!r}],
+            "yearly",
+            ",905,,AGWS",
+            workers=2,
+        )
+        assert (out.iloc[:, 0] == out.iloc[:, 1]).all()
+        """
+    )
@@ -5,6 +5,8 @@ catalog
 Tests for `hspf_reader plotgen` module.
 """
 
+import subprocess
+import sys
 from io import StringIO
 from unittest import TestCase
 
@@ -12,6 +14,11 @@ import pandas as pd
 from pandas.testing import assert_frame_equal
 
 from toolbox_utils import tsutils
+from toolbox_utils.readers.plotgen import (
+    plotgen_columns,
+    plotgen_extract,
+    plotgen_iter,
+)
 
 
 class TestDescribe(TestCase):
@@ -758,3 +765,67 @@ class TestDescribe(TestCase):
     def test_api(self):
         out = tsutils.common_kwds("tests/data_plotgen.plt").astype("float64")
         assert_frame_equal(out, self.extract_api)
+
+    def test_api_date_window(self):
+        out = tsutils.common_kwds(
+            "tests/data_plotgen.plt",
+            start_date="1976-03-01 12:00",
+            end_date="1976-06-30",
+        ).astype("float64")
+        assert_frame_equal(
+            out,
+            tsutils.asbestfreq(
+                self.extract_api.loc["1976-03-01 12:00":"1976-06-30 00:00"]
+            ),
+        )
+
+    def test_extract_date_window(self):
+        out = plotgen_extract(
+            "tests/data_plotgen.plt", start_date="1976-12-31", end_date="1977-01-01"
+        )
+        assert list(out.index.astype(str)) == [
+            "1976-12-31 00:00:00",
+            "1976-12-31 12:00:00",
+            "1977-01-01 00:00:00",
+        ]
+
+    def test_api_columns(self):
+        out = tsutils.common_kwds("tests/data_plotgen.plt,TOTAL OUTFLOW,1").astype(
+            "float64"
+        )
+        assert_frame_equal(
+            out, self.extract_api[["TOTAL OUTFLOW", "GROUNDWATER"]], check_names=False
+        )
+
+    def test_columns(self):
+        assert plotgen_columns("tests/data_plotgen.plt") == [
+            "GROUNDWATER",
+            "INTERFLOW",
+            "SURFACE",
+            "TOTAL OUTFLOW",
+        ]
+
+    def test_import_first(self):
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from toolbox_utils.readers.plotgen import plotgen_columns",
+            ],
+            check=True,
+        )
+
+    def test_iter(self):
+        chunks = list(plotgen_iter("tests/data_plotgen.plt", chunksize=100))
+        assert [len(i) for i in chunks] == [100] * 7 + [32]
+        assert_frame_equal(pd.concat(chunks), plotgen_extract("tests/data_plotgen.plt"))
+        chunks = list(
+            plotgen_iter(
+                "tests/data_plotgen.plt",
+                chunksize=3,
+                start_date="1976-12-30",
+                columns=["SURFACE"],
+            )
+        )
+        assert [len(i) for i in chunks] == [3, 2]
+        assert list(chunks[0].columns) == ["SURFACE"]
@@ -1,9 +1,20 @@
+import asyncio
+import functools
+import gzip
+import io
+import json
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from unittest import TestCase
+from urllib.parse import urlsplit
 
 import pandas
+import pytest
 from pandas.testing import assert_frame_equal
 
 from toolbox_utils import tsutils
+from toolbox_utils.readers.url import _cache_name, url_cache_get, url_get
 
 
 class TestRead(TestCase):
@@ -104,3 +115,404 @@ def test_read_xlsx_sheet_number():
     comp = tsutils.common_kwds(input_tsd="tests/data.wdm,2")
     comp.columns = ["0_Lake Helen"]
     assert_frame_equal(out, comp, check_dtype=False)
+
+
+def test_read_csv_engine():
+    """The C engine and the python engine read the same values."""
+    for fname in (
+        "tests/data_bi_daily.csv",
+        "tests/data_start.bivl.csv",
+        "tests/data_wdm_1.csv",
+    ):
+        assert_frame_equal(
+            tsutils.read_iso_ts(fname),
+            tsutils.read_iso_ts(f"{fname},engine='python'"),
+        )
+
+
+def test_read_pick_pushdown():
+    """Picking while reading gives the same columns as picking afterwards."""
+    full = tsutils.common_kwds(input_tsd="tests/data_bi_daily.csv")
+    for pick in ([2, "Value"], ["Value1"], ["Datetime", 2]):
+        assert_frame_equal(
+            tsutils.common_kwds(input_tsd="tests/data_bi_daily.csv", pick=pick),
+            tsutils._pick(full, pick),
+            check_freq=False,
+        )
+    out = tsutils.common_kwds(input_tsd="tests/data_flow_stage.xlsx", pick=[1])
+    assert list(out.columns) == ["Lake Helen"]
+
+
+def test_read_date_window():
+    """Reading a date window of a sorted CSV is the same as slicing."""
+    fname = "tests/data_start.daily.csv"
+    out = tsutils.read_iso_ts(
+        fname, start_date="2007-06-01", end_date="2007-09-01", sorted_index=True
+    )
+    comp = tsutils._date_slice(tsutils.read_iso_ts(fname), "2007-06-01", "2007-09-01")
+    assert_frame_equal(out, comp, check_freq=False)
+    assert tsutils._csv_window(fname, ",", "2007-06-01", "2007-09-01") is not None
+    assert tsutils._csv_window(fname, ",", "1800-01-01", "1800-02-01") is None
+
+
+def test_read_date_window_unsorted(tmp_path):
+    """Without sorted_index an unsorted CSV is read whole, then sliced."""
+    dates = pandas.date_range("2000-01-01", "2000-12-31", freq="D")
+    tsd = pandas.DataFrame({"Value": range(len(dates))}, index=dates)
+    tsd.index.name = "Datetime"
+    fname = tmp_path / "twoblocks.csv"
+    split = len(tsd) // 3
+    pandas.concat([tsd.iloc[split:], tsd.iloc[:split]]).to_csv(fname)
+    out = tsutils.common_kwds(
+        str(fname), start_date="2000-01-10", end_date="2000-06-10"
+    )
+    assert len(out) == len(tsd.loc["2000-01-10":"2000-06-10"])
+
+
+def test_read_date_window_sources():
+    """Only the sources that can seek are windowed by read_iso_ts."""
+    fname = "tests/data_start.daily.csv"
+    full = tsutils.read_iso_ts(fname)
+    out = tsutils.read_iso_ts(
+        fname, start_date="2007-06-01", end_date="2007-09-01", sorted_index=True
+    )
+    assert out.index[0] == pandas.Timestamp("2007-06-01")
+    assert out.index[-1] == pandas.Timestamp("2007-09-01")
+    out = tsutils.read_iso_ts(full, start_date="2007-06-01", end_date="2007-09-01")
+    assert_frame_equal(out, full)
+    out = tsutils.common_kwds(full, start_date="2007-06-01", end_date="2007-09-01")
+    assert out.index[0] == pandas.Timestamp("2007-06-01")
+    assert out.index[-1] == pandas.Timestamp("2007-09-01")
+
+
+def test_read_chunksize():
+    """Chunks have the same rows and columns as a single read."""
+    for fname in ("tests/data_start.daily.csv", "tests/data_plotgen.plt"):
+        chunks = list(tsutils.read_iso_ts(fname, chunksize=100))
+        assert max(len(i) for i in chunks) == 100
+        assert_frame_equal(
+            pandas.concat(chunks),
+            tsutils.read_iso_ts(fname),
+            check_dtype=False,
+            check_freq=False,
+        )
+    with pytest.raises(ValueError):
+        tsutils.read_iso_ts(
+            "tests/data_simple.csv", "tests/data_simple.csv", chunksize=10
+        )
+
+
+def test_read_cache(tmp_path):
+    """A second read of an unchanged file comes from the cache."""
+    tsutils.read_cache_clear()
+    fname = tmp_path / "data.csv"
+    fname.write_text("Datetime,Value\n2000-01-01,4.5\n2000-01-02,4.6\n")
+    cache_dir = str(tmp_path / "cache")
+
+    first = tsutils.read_iso_ts(str(fname), cache_dir=cache_dir)
+    assert_frame_equal(tsutils.read_iso_ts(str(fname), cache_dir=cache_dir), first)
+    assert tsutils.read_cache_info() == {"hits": 1, "misses": 1}
+
+    fname.write_text("Datetime,Value\n2000-01-01,4.5\n2000-01-02,4.7\n2000-01-03,4.8\n")
+    assert len(tsutils.read_iso_ts(str(fname), cache_dir=cache_dir)) == 3
+    assert tsutils.read_cache_info() == {"hits": 1, "misses": 2}
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    tsutils.read_iso_ts(str(fname), cache_dir=cache_dir, usecols=[1], cache_size=0)
+    assert not list((tmp_path / "cache").iterdir())
+
+    fname.write_text(
+        "Datetime,Value\n2000-01-01T00:00:00-05:00,4.5\n2000-01-02T00:00:00-05:00,4.6\n"
+    )
+    first = tsutils.read_iso_ts(str(fname), cache_dir=cache_dir)
+    assert_frame_equal(tsutils.read_iso_ts(str(fname), cache_dir=cache_dir), first)
+    assert tsutils.read_cache_info() == {"hits": 2, "misses": 4}
+    tsutils.read_cache_clear()
+
+
+def test_read_cache_hbn(tmp_path):
+    """A cached HBN source keeps its PeriodIndex, with a Path cache_dir."""
+    tsutils.read_cache_clear()
+    source = "tests/data_yearly.hbn,yearly,,905,,AGWS"
+    cache_dir = tmp_path / "cache"
+
+    first = tsutils.read_iso_ts(source, cache_dir=cache_dir)
+    assert_frame_equal(tsutils.read_iso_ts(source, cache_dir=cache_dir), first)
+    assert tsutils.read_cache_info() == {"hits": 1, "misses": 1}
+    tsutils.read_cache_clear()
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "npy"])
+def test_read_binary_pipe(fmt, monkeypatch):
+    """The binary printiso formats are detected on standard input."""
+    if fmt == "arrow":
+        pytest.importorskip("pyarrow")
+    tsd = tsutils.read_iso_ts("tests/data_start.bivl.csv")
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, "stdout", stdout)
+    tsutils.printiso(tsd, tablefmt=fmt)
+    stdout.flush()
+    data = stdout.buffer.getvalue()
+    assert data.startswith(b"TBU:")
+
+    monkeypatch.setattr(
+        sys, "stdin", io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)))
+    )
+    assert_frame_equal(tsutils.read_iso_ts("-"), tsd, check_freq=False)
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "npy"])
+def test_read_binary_pipe_text(fmt, monkeypatch):
+    """A missing text value stays missing through the binary formats."""
+    if fmt == "arrow":
+        pytest.importorskip("pyarrow")
+    tsd = tsutils.read_iso_ts(b"Datetime,a,s\n2000-01-01,1,x\n2000-01-02,2,\n")
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, "stdout", stdout)
+    tsutils.printiso(tsd, tablefmt=fmt)
+    stdout.flush()
+    monkeypatch.setattr(
+        sys,
+        "stdin",
+        io.TextIOWrapper(io.BufferedReader(io.BytesIO(stdout.buffer.getvalue()))),
+    )
+    out = tsutils.read_iso_ts("-")
+    assert out["s"].isna().tolist() == [False, True]
+    assert_frame_equal(out, tsd, check_freq=False)
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "npy"])
+def test_read_binary_pipe_hbn(fmt, monkeypatch):
+    """A PeriodIndex comes back as the DatetimeIndex of a CSV pipe."""
+    if fmt == "arrow":
+        pytest.importorskip("pyarrow")
+    tsd = tsutils.read_iso_ts("tests/data_yearly.hbn,yearly,,905,,AGWS")
+    data = {}
+    for tablefmt in ("csv", fmt):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        monkeypatch.setattr(sys, "stdout", stdout)
+        tsutils.printiso(tsd, tablefmt=tablefmt)
+        stdout.flush()
+        data[tablefmt] = stdout.buffer.getvalue()
+
+    out = {}
+    for tablefmt, value in data.items():
+        monkeypatch.setattr(
+            sys, "stdin", io.TextIOWrapper(io.BufferedReader(io.BytesIO(value)))
+        )
+        out[tablefmt] = tsutils.read_iso_ts("-")
+    assert isinstance(out[fmt].index, pandas.DatetimeIndex)
+    assert_frame_equal(out[fmt], out["csv"], check_dtype=False, check_freq=False)
+
+
+def test_printiso_pipe_format_file(tmp_path, monkeypatch):
+    """The pipe format environment variable doesn't apply to files."""
+    monkeypatch.setenv("TOOLBOX_UTILS_PIPE_FORMAT", "npy")
+    tsd = tsutils.read_iso_ts("tests/data_simple.csv")
+    with open(tmp_path / "out.csv", "w", encoding="utf-8") as stdout:
+        monkeypatch.setattr(sys, "stdout", stdout)
+        tsutils.printiso(tsd)
+    assert (tmp_path / "out.csv").read_text().startswith("Datetime,")
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    tsutils.printiso(tsd, tablefmt="npy")
+    assert sys.stdout.getvalue().startswith("Datetime,")
+
+
+def test_read_csv_parallel(monkeypatch):
+    """Parsing byte ranges in parallel gives the same DataFrame."""
+    fname = "tests/data_start.bivl.csv"
+    comp = tsutils.read_iso_ts(fname)
+    monkeypatch.setattr(tsutils, "_PARALLEL_CSV_SIZE", 0)
+    monkeypatch.setattr(tsutils.os, "cpu_count", lambda: 3)
+    assert len(tsutils._csv_ranges(fname, 3)[1]) == 3
+    assert_frame_equal(tsutils.read_iso_ts(fname), comp)
+
+
+def test_read_csv_parallel_off(monkeypatch):
+    """The environment variable and other threads turn the pool off."""
+    fname = "tests/data_start.bivl.csv"
+    comp = tsutils.read_iso_ts(fname)
+    monkeypatch.setattr(tsutils, "_PARALLEL_CSV_SIZE", 0)
+    monkeypatch.setattr(tsutils.os, "cpu_count", lambda: 3)
+
+    def parallel(*args, **kwds):
+        raise AssertionError("parsed in parallel")
+
+    monkeypatch.setattr(tsutils, "_read_csv_parallel", parallel)
+    monkeypatch.setenv("TOOLBOX_UTILS_CSV_WORKERS", "1")
+    assert_frame_equal(tsutils.read_iso_ts(fname), comp)
+
+    monkeypatch.delenv("TOOLBOX_UTILS_CSV_WORKERS")
+    out = {}
+    thread = threading.Thread(target=lambda: out.update(tsd=tsutils.read_iso_ts(fname)))
+    thread.start()
+    thread.join()
+    assert_frame_equal(out["tsd"], comp)
+
+
+def test_read_csv_parallel_serial(tmp_path, monkeypatch):
+    """Compressed files and quoted values are read in one piece."""
+    fname = "tests/data_start.bivl.csv"
+    comp = tsutils.read_iso_ts(fname)
+    monkeypatch.setattr(tsutils, "_PARALLEL_CSV_SIZE", 0)
+    monkeypatch.setattr(tsutils.os, "cpu_count", lambda: 3)
+    with open(fname, "rb") as fpi:
+        data = fpi.read()
+    (tmp_path / "data.csv.gz").write_bytes(gzip.compress(data))
+    assert_frame_equal(tsutils.read_iso_ts(str(tmp_path / "data.csv.gz")), comp)
+
+    lines = [b"Datetime,Value,Note"] + [
+        f"2000-01-{day:02d},{day},".encode() for day in range(1, 29)
+    ]
+    lines[14] += b'"two\nlines"'
+    (tmp_path / "quoted.csv").write_bytes(b"\n".join(lines) + b"\n")
+    assert tsutils._csv_ranges(str(tmp_path / "quoted.csv"), 3)[1] == []
+    out = tsutils.read_iso_ts(str(tmp_path / "quoted.csv"))
+    assert len(out) == 28
+    assert out["Note"].dropna().tolist() == ["two\nlines"]
+
+
+def test_read_merge_many():
+    """Merging many sources gives unique column names on the union index."""
+    out = tsutils.read_iso_ts(*["tests/data_simple.csv"] * 4)
+    assert list(out.columns) == ["Value", "Value_r", "Value_r2", "Value_r3"]
+    out = tsutils.read_iso_ts(
+        "tests/data_start.daily.csv",
+        "tests/data_end.daily.csv",
+        "tests/data_start.monthly.csv",
+    )
+    assert out.columns.is_unique
+    assert out.index.is_monotonic_increasing
+    assert len(out) == len(out.index.unique())
+
+
+def test_read_merge_empty(tmp_path):
+    """An empty source keeps its columns and the DatetimeIndex of the others."""
+    fname = tmp_path / "empty.csv"
+    fname.write_text("Datetime,Empty\n")
+    comp = tsutils.read_iso_ts("tests/data_simple.csv")
+    for sources in (
+        (str(fname), "tests/data_simple.csv"),
+        ("tests/data_simple.csv", str(fname)),
+    ):
+        out = tsutils.read_iso_ts(*sources)
+        assert isinstance(out.index, pandas.DatetimeIndex)
+        assert sorted(out.columns) == ["Empty", "Value"]
+        assert out["Empty"].isna().all()
+        assert_frame_equal(out[["Value"]], comp, check_freq=False, check_names=False)
+
+
+def test_read_align():
+    """Mixed frequencies are upsampled within the memory limit or unioned."""
+    fnames = ("tests/data_start.monthly.csv", "tests/data_start.daily.csv")
+    full = tsutils.read_iso_ts(*fnames)
+    with pytest.raises(ValueError, match="max_memory"):
+        tsutils.read_iso_ts(*fnames, max_memory=1000)
+    out = tsutils.read_iso_ts(*fnames, align="union", max_memory=1000)
+    monthly, daily = (tsutils.read_iso_ts(i) for i in fnames)
+    assert out.index.equals(monthly.index.union(daily.index))
+    assert len(out) <= len(full)
+
+
+@pytest.fixture
+def http_tests():
+    """Serve the tests directory over HTTP/1.1 and yield the base URL."""
+
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def translate_path(self, path):
+            # Requests through a proxy have the whole URL as the path.
+            return super().translate_path(urlsplit(path).path)
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(Handler, directory="tests")
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_aread(http_tests):
+    """The asynchronous read gives the same DataFrame as read_iso_ts."""
+    sources = (
+        f"{http_tests}data_start.daily.csv",
+        f"{http_tests}data_end.daily.csv",
+        "tests/data_bi_daily.csv",
+    )
+    assert_frame_equal(
+        asyncio.run(tsutils.aread_iso_ts(*sources, max_connections=2)),
+        tsutils.read_iso_ts(*sources),
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(tsutils.aread_iso_ts(*sources, chunksize=10))
+
+
+def test_read_url_schemes():
+    """Only http and https sources are fetched, the rest are left to pandas."""
+    assert tsutils._source_urls(
+        [
+            "http://example.com/a.csv",
+            "https://example.com/b.csv",
+            "ftp://example.com/c.csv",
+            "s3://bucket/d.csv",
+        ]
+    ) == ["http://example.com/a.csv", "https://example.com/b.csv"]
+    with pytest.raises(ValueError):
+        url_get("ftp://example.com/c.csv")
+
+
+def test_read_url_proxy(http_tests, monkeypatch):
+    """The http_proxy environment variable is used to fetch URLs."""
+    for name in ("no_proxy", "NO_PROXY", "HTTP_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("http_proxy", http_tests)
+    with open("tests/data_simple.csv", "rb") as fpi:
+        assert url_get("http://data.invalid/data_simple.csv")[2] == fpi.read()
+
+
+def test_read_url_cache(http_tests, tmp_path, monkeypatch):
+    """Unchanged URLs are revalidated and loaded from the cache."""
+    url = f"{http_tests}data_simple.csv"
+    tsutils.read_cache_clear()
+    first = tsutils.read_iso_ts(url, cache_dir=str(tmp_path))
+    assert_frame_equal(first, tsutils.read_iso_ts(url))
+    assert_frame_equal(tsutils.read_iso_ts(url, cache_dir=str(tmp_path)), first)
+    assert tsutils.read_cache_info() == {"hits": 1, "misses": 1}
+
+    def offline(*args, **kwds):
+        raise OSError("no requests within the cache_ttl")
+
+    monkeypatch.setattr("toolbox_utils.readers.url.url_get", offline)
+    assert_frame_equal(
+        tsutils.read_iso_ts(url, cache_dir=str(tmp_path), cache_ttl=3600), first
+    )
+    with pytest.raises(OSError):
+        tsutils.read_iso_ts(url, cache_dir=str(tmp_path))
+
+
+def test_url_cache_versions(http_tests, tmp_path):
+    """Each body is stored under its hash and replaced bodies are removed."""
+    url = f"{http_tests}data_simple.csv"
+    body, version = url_cache_get(url, tmp_path)
+    assert sorted(i.name for i in tmp_path.iterdir()) == sorted(
+        [f"{_cache_name(url)}.json", f"{_cache_name(url)}-{version}.http"]
+    )
+
+    # Headers of an older body, without validators, so the body is fetched.
+    (tmp_path / f"{_cache_name(url)}-old.http").write_bytes(b"old")
+    (tmp_path / f"{_cache_name(url)}.json").write_text(
+        json.dumps({"url": url, "version": "old", "checked": 0})
+    )
+    assert url_cache_get(url, tmp_path) == (body, version)
+    assert not (tmp_path / f"{_cache_name(url)}-old.http").exists()
+    assert (
+        json.loads((tmp_path / f"{_cache_name(url)}.json").read_text())["version"]
+        == version
+    )
+    with pytest.raises(ValueError):
+        url_cache_get("ftp://example.com/data.csv", tmp_path)